@@ -2,6 +2,7 @@ import re
 from datetime import datetime
 import csv
 import json
+import numpy as np
 
 def get_ordered_syllable_for_song(song_syllable_onsets_offsets_ms):
     """Using syllable_onsets_offsets_ms dictionary return an ordered list of tuples (syllable_label, onset, offset)
@@ -90,7 +91,10 @@ def load_single_bird_syllable_csv(file_path):
     return results
 
 def split_dataset_by_surgery_date(results, surgery_date):
-    """Split the dataset into two groups: pre-surgery and post-surgery based on the date of surgery"""
+    """Split the dataset into two groups: pre-surgery and post-surgery based on the date of surgery
+
+    See SongArchive.split_by_surgery_date for a binary search over an indexed archive.
+    """
     results_pre_surgery = []
     results_post_surgery = []
 
@@ -105,3 +109,151 @@ def split_dataset_by_surgery_date(results, surgery_date):
             results_post_surgery.append(result)
 
     return results_pre_surgery, results_post_surgery
+
+
+class SongArchive:
+    """Songs parsed by load_single_bird_syllable_csv, indexed by animal id and recording time.
+
+    The syllables of every song are encoded as indexes in `alphabet` and stored back to back in
+    one array, songs sorted by (animal_id, recording_time). Song i is
+    syllables[song_offsets[i]:song_offsets[i + 1]], with the onset and offset of each syllable
+    in `onsets` and `offsets`. Queries narrow the songs down with binary searches on the sorted
+    keys before any other filter is applied, and return views of the syllable arrays.
+
+    Songs without a recording time (a file name that could not be parsed) are kept after the
+    other songs of their animal, and are never matched by a time filter.
+    """
+
+    def __init__(self, results, alphabet=None):
+        animal_ids = sorted({result['animal_id'] or '' for result in results})
+        animal_codes = {animal_id: code for code, animal_id in enumerate(animal_ids)}
+
+        if alphabet is None:
+            alphabet = []
+            seen = set()
+            for result in results:
+                for syllable, _, _ in result['ordered_and_timed_syllables']:
+                    if syllable not in seen:
+                        seen.add(syllable)
+                        alphabet.append(syllable)
+
+        recording_times = np.array(
+            [result['recording_time'] or 'NaT' for result in results], dtype='datetime64[s]')
+        animals = np.array([animal_codes[result['animal_id'] or ''] for result in results], dtype=np.intp)
+
+        # NaT sorts after every time
+        order = np.lexsort((recording_times, animals))
+        results = [results[idx] for idx in order]
+
+        self.alphabet = list(alphabet)
+        self.animal_ids = animal_ids
+        self.animals = animals[order]
+        self.recording_times = recording_times[order]
+        self.song_present = np.array([str(result['song_present']) == 'True' for result in results], dtype=bool)
+        self.file_names = [result['file_name'] for result in results]
+
+        syllable_index = {syllable: idx for idx, syllable in enumerate(self.alphabet)}
+        lengths = np.array([len(result['ordered_and_timed_syllables']) for result in results], dtype=np.int64)
+        self.song_offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+        timed_syllables = [syllable for result in results for syllable in result['ordered_and_timed_syllables']]
+        self.syllables = np.array(
+            [syllable_index[syllable] for syllable, _, _ in timed_syllables],
+            dtype=np.min_scalar_type(max(len(self.alphabet) - 1, 0)))
+        self.onsets = np.array([onset for _, onset, _ in timed_syllables], dtype=float)
+        self.offsets = np.array([offset for _, _, offset in timed_syllables], dtype=float)
+
+        # song ranges of each animal, and the end of its songs with a recording time
+        self._animal_starts = np.searchsorted(self.animals, np.arange(len(animal_ids)), side='left')
+        self._animal_ends = np.searchsorted(self.animals, np.arange(len(animal_ids)), side='right')
+        self._timed_ends = np.array([
+            start + np.count_nonzero(~np.isnat(self.recording_times[start:end]))
+            for start, end in zip(self._animal_starts, self._animal_ends)
+        ], dtype=np.intp)
+
+    @classmethod
+    def from_csv(cls, *file_paths, alphabet=None):
+        """Load and index the songs of one or more csv files, see load_single_bird_syllable_csv."""
+        results = []
+        for file_path in file_paths:
+            results.extend(load_single_bird_syllable_csv(file_path))
+        return cls(results, alphabet=alphabet)
+
+    def __len__(self):
+        return len(self.file_names)
+
+    def song(self, idx):
+        """Return the encoded syllables of song idx, as a view."""
+        return self.syllables[self.song_offsets[idx]:self.song_offsets[idx + 1]]
+
+    def decode(self, song):
+        """Return the syllable labels of an encoded song."""
+        return [self.alphabet[idx] for idx in song]
+
+    def select(self, bird=None, start=None, end=None, song_present=None, hours=None):
+        """Return the indexes of the matching songs, in (animal_id, recording_time) order.
+
+        Inputs:
+            bird (str) - animal id (default: every animal)
+            start (datetime) - keep songs recorded at or after start
+            end (datetime) - keep songs recorded before end
+            song_present (bool) - keep songs whose song_present flag has this value
+            hours (tuple) - (first_hour, last_hour), keep songs recorded from first_hour
+                up to (excluding) last_hour of the day. first_hour > last_hour wraps around midnight
+        """
+        if bird is None:
+            animals = range(len(self.animal_ids))
+        elif bird in self.animal_ids:
+            animals = [self.animal_ids.index(bird)]
+        else:
+            animals = []
+
+        time_filter = start is not None or end is not None or hours is not None
+
+        ranges = []
+        for animal in animals:
+            base = self._animal_starts[animal]
+            times = self.recording_times[base:self._timed_ends[animal]]
+
+            lo = base
+            hi = self._timed_ends[animal] if time_filter else self._animal_ends[animal]
+            if start is not None:
+                lo = base + np.searchsorted(times, np.datetime64(start, 's'), side='left')
+            if end is not None:
+                hi = base + np.searchsorted(times, np.datetime64(end, 's'), side='left')
+
+            if lo < hi:
+                ranges.append(np.arange(lo, hi))
+
+        indexes = np.concatenate(ranges) if ranges else np.zeros(0, dtype=np.intp)
+
+        if song_present is not None:
+            indexes = indexes[self.song_present[indexes] == song_present]
+
+        if hours is not None:
+            first_hour, last_hour = hours
+            times = self.recording_times[indexes]
+            hour = (times - times.astype('datetime64[D]')).astype('timedelta64[h]').astype(int)
+            if first_hour <= last_hour:
+                indexes = indexes[(hour >= first_hour) & (hour < last_hour)]
+            else:
+                indexes = indexes[(hour >= first_hour) | (hour < last_hour)]
+
+        return indexes
+
+    def songs(self, bird=None, start=None, end=None, song_present=None, hours=None):
+        """Return the encoded syllables of the matching songs, as views. See select."""
+        return [self.song(idx) for idx in self.select(bird, start, end, song_present, hours)]
+
+    def split_by_surgery_date(self, surgery_date, bird=None):
+        """Return the indexes of the songs recorded before and after surgery_date.
+
+        Same as split_dataset_by_surgery_date, with a binary search per animal.
+        """
+        pre = self.select(bird=bird, end=surgery_date)
+        post = self.select(bird=bird, start=surgery_date)
+
+        if len(post) and np.any(self.recording_times[post] == np.datetime64(surgery_date, 's')):
+            raise ValueError("Recording date is the same as the surgery date")
+
+        return pre, post
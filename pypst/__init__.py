@@ -1 +1,2 @@
 from .wrapper import PST
+from .fit_stats import FitStats
@@ -0,0 +1,142 @@
+"""Command line interface of pypst.
+
+    python -m pypst fit songs.json -o model.pkl -L 3
+    python -m pypst score model.pkl songs.json
+    python -m pypst compare pre.pkl post.pkl songs.json
+    python -m pypst export model.pkl --format json -o tree.json
+
+Songs are read from a .json file holding a list of songs (each a list of symbols), a MATLAB
+.mat file (see pypst.matlab) or a text file with one song per line, its symbols separated by
+whitespace. Models are pickled PST instances. Log-likelihoods are natural logarithms.
+
+Only NumPy is imported besides the standard library, so that short jobs start quickly.
+"""
+import argparse
+import json
+import pickle
+import sys
+
+
+def read_songs(path):
+    """Read songs from a .json list of songs, a .mat file or a text file with one song per line."""
+    if path.endswith('.mat'):
+        from pypst.matlab import load_songs_mat
+        return load_songs_mat(path)
+
+    with open(path, 'r') as fp:
+        if path.endswith('.json'):
+            return json.load(fp)
+        return [line.split() for line in fp if line.strip()]
+
+
+def load_model(path):
+    with open(path, 'rb') as fp:
+        return pickle.load(fp)
+
+
+def fit(args):
+    from pypst.wrapper import PST
+
+    pst = PST(
+        L=args.L,
+        p_min=args.p_min,
+        g_min=args.g_min,
+        r=args.r,
+        alpha=args.alpha,
+        alphabet=args.alphabet,
+        learn_mode=args.learn_mode,
+        n_jobs=args.n_jobs,
+        max_nodes=args.max_nodes,
+        prune_counts=args.prune_counts
+    )
+    pst.fit(read_songs(args.songs))
+
+    with open(args.output, 'wb') as fp:
+        pickle.dump(pst, fp)
+
+
+def score(args):
+    songs = read_songs(args.songs)
+    scores = load_model(args.model).automaton.score(songs)
+
+    print('song\tlength\tlog_likelihood')
+    for idx, (song, song_score) in enumerate(zip(songs, scores)):
+        print(f'{idx}\t{len(song)}\t{song_score:.6g}')
+
+
+def compare(args):
+    songs = read_songs(args.songs)
+    scores_a = load_model(args.model_a).automaton.score(songs)
+    scores_b = load_model(args.model_b).automaton.score(songs)
+
+    print('song\tlength\tlog_likelihood_a\tlog_likelihood_b\tlog_likelihood_ratio')
+    for idx, (song, score_a, score_b) in enumerate(zip(songs, scores_a, scores_b)):
+        print(f'{idx}\t{len(song)}\t{score_a:.6g}\t{score_b:.6g}\t{score_a - score_b:.6g}')
+
+    num_symbols = max(sum(len(song) for song in songs), 1)
+    print(f'# log-likelihood per symbol: a={scores_a.sum() / num_symbols:.6g} b={scores_b.sum() / num_symbols:.6g}')
+
+
+def export(args):
+    from pypst.pst_export import pst_export_to_cytoscape, pst_export_to_json
+
+    pst = load_model(args.model)
+    if args.format == 'json':
+        pst_export_to_json(pst.tree, pst.alphabet, args.output)
+    elif args.format == 'mat':
+        from pypst.matlab import save_tree_mat
+        save_tree_mat(args.output, pst.tree, pst.alphabet)
+    else:
+        pst_export_to_cytoscape(pst.tree, pst.alphabet, output_dir=args.output, filename=args.filename)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m pypst', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fit_parser = commands.add_parser('fit', help='fit a PST and pickle it')
+    fit_parser.add_argument('songs')
+    fit_parser.add_argument('-o', '--output', required=True, help='file to write the pickled PST to')
+    fit_parser.add_argument('-L', type=int, default=2, help='maximum order of the tree')
+    fit_parser.add_argument('--p-min', type=float, default=0.0073)
+    fit_parser.add_argument('--g-min', type=float, default=0.01)
+    fit_parser.add_argument('--r', type=float, default=1.6)
+    fit_parser.add_argument('--alpha', type=float, default=17.5)
+    fit_parser.add_argument('--alphabet', nargs='+', help='symbols, in order (default: in order of first appearance in the songs)')
+    fit_parser.add_argument('--learn-mode', default='sequential', choices=['sequential', 'level', 'best_first'])
+    fit_parser.add_argument('--max-nodes', type=int, help='maximum number of nodes of the tree (requires best_first)')
+    fit_parser.add_argument(
+        '--prune-counts', action='store_true', help='count only the contexts pst_learn can visit for p-min')
+    fit_parser.add_argument('--n-jobs', type=int, default=1, help='number of processes, -1 for one per CPU')
+    fit_parser.set_defaults(run=fit)
+
+    score_parser = commands.add_parser('score', help='log-likelihood of each song under a PST')
+    score_parser.add_argument('model')
+    score_parser.add_argument('songs')
+    score_parser.set_defaults(run=score)
+
+    compare_parser = commands.add_parser('compare', help='log-likelihood of each song under two PSTs')
+    compare_parser.add_argument('model_a')
+    compare_parser.add_argument('model_b')
+    compare_parser.add_argument('songs')
+    compare_parser.set_defaults(run=compare)
+
+    export_parser = commands.add_parser('export', help='export the tree of a PST')
+    export_parser.add_argument('model')
+    export_parser.add_argument('--format', default='json', choices=['json', 'mat', 'cytoscape'])
+    export_parser.add_argument(
+        '-o', '--output', required=True, help='file to write (json, mat) or directory to write to (cytoscape)')
+    export_parser.add_argument('--filename', default='cytoscape_output_tree', help='root name of the cytoscape files')
+    export_parser.set_defaults(run=export)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,15 @@
+import json
+import pytest
+
+
+@pytest.fixture
+def dataset():
+    """Songs of the example dataset, each a string of syllables."""
+    with open('fixtures/output_symbols.json', 'r') as fp:
+        return json.load(fp)
+
+
+@pytest.fixture
+def fixture_alphabet():
+    """The syllables of the example dataset, in the order of the example tree."""
+    return [a for a in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcd']
@@ -0,0 +1,259 @@
+import os
+from itertools import islice
+from typing import Iterable, List
+import numpy as np
+from pypst.transition_mat import SparseOccurrenceMat
+
+
+def build_transition_matrix_out_of_core(
+    songs : Iterable[Iterable[str]],
+    order : int,
+    alphabet : List[str],
+    chunk_size : int = 1_000_000,
+    max_memory : int = 256 * 2**20,
+    tmp_dir : str = None
+):
+    """Build the transition matrices of build_transition_matrix without holding the dataset in memory.
+
+    Songs are read lazily from `songs` (any iterable, each song itself any iterable of items)
+    in chunks of at most `chunk_size` items. A song longer than the space left in a chunk is
+    continued in the next one, together with its last `order` items so that the n-grams
+    spanning the boundary are counted exactly once. The n-gram counts of each chunk are kept
+    as sorted runs; once they take more than `max_memory` bytes they are written to temporary
+    files, and the runs are combined with an external merge at the end, block by block, into
+    the final matrices. `max_memory` only bounds these runs: the arrays of the chunk being
+    counted and the final matrices (their contexts and uint32 counts) come on top of it.
+
+    Inputs:
+        songs (Iterable[Iterable[str]]) - the sequences of items, read once
+        order (int) - the order of the PST to build
+        alphabet (List[str]) - the list of items. Required since the songs can only be read once
+        chunk_size (int) - maximum number of items counted at once
+        max_memory (int) - bytes of n-gram counts held in memory before spilling them to disk
+        tmp_dir (str) - directory for the spilled runs (default: the system temporary directory)
+
+    Outputs:
+        the same keys as build_transition_matrix. occurrence_mats[0] is dense, higher orders are
+        SparseOccurrenceMat instances holding every observed context. Counts are uint32.
+    """
+    if alphabet is None:
+        raise ValueError("An alphabet is required to count songs out of core.")
+
+    import tempfile
+
+    alphabet_length = len(alphabet)
+    alphabet_index = {item: idx for idx, item in enumerate(alphabet)}
+
+    if alphabet_length ** (order + 1) > np.iinfo(np.int64).max:
+        raise ValueError(f"n-grams of order {order} over {alphabet_length} symbols can not be indexed.")
+
+    unigram_counts = np.zeros(alphabet_length, dtype=np.int64)
+    p_starting_symbol = np.zeros(alphabet_length, dtype=np.int64)
+    n = np.zeros(order + 1, dtype=np.int64)
+
+    # in memory runs of (sorted n-gram codes, counts) and spilled run files, per order
+    pending = [[] for _ in range(order + 1)]
+    run_files = [[] for _ in range(order + 1)]
+    pending_bytes = 0
+
+    with tempfile.TemporaryDirectory(prefix='pypst_runs_', dir=tmp_dir) as run_dir:
+        for chunk in iter_song_chunks(songs, alphabet_index, order, chunk_size):
+            chunk_counts = count_chunk(chunk, order, alphabet_length)
+
+            unigram_counts += chunk_counts['unigram_counts']
+            p_starting_symbol += chunk_counts['p_starting_symbol']
+            n += chunk_counts['N']
+
+            for cur_order in range(1, order + 1):
+                pending[cur_order].append(chunk_counts['runs'][cur_order])
+                pending_bytes += run_nbytes(chunk_counts['runs'][cur_order])
+
+            if pending_bytes > max_memory // 2:
+                pending = [[combine_runs(runs)] if runs else [] for runs in pending]
+                pending_bytes = sum(run_nbytes(run) for runs in pending for run in runs)
+
+            if pending_bytes > max_memory:
+                for cur_order in range(1, order + 1):
+                    if not pending[cur_order]:
+                        continue
+                    path = os.path.join(run_dir, f'order_{cur_order}_run_{len(run_files[cur_order])}.npy')
+                    np.save(path, np.stack(combine_runs(pending[cur_order])))
+                    run_files[cur_order].append(path)
+                pending = [[] for _ in range(order + 1)]
+                pending_bytes = 0
+
+        occurrence_mats = [unigram_counts.astype(np.uint32)]
+        for cur_order in range(1, order + 1):
+            runs = [np.load(path, mmap_mode='r') for path in run_files[cur_order]]
+            if pending[cur_order]:
+                runs.append(np.stack(combine_runs(pending[cur_order])))
+
+            occurrence_mats.append(build_sparse_occurrence_mat(runs, cur_order, alphabet_length))
+
+            # release the memory maps before the run directory is removed
+            del runs
+
+    return {
+        "occurrence_mats": occurrence_mats,
+        "p_starting_symbol": p_starting_symbol.astype(np.uint32),
+        "alphabet": alphabet,
+        "N": n.astype(np.uint32)
+    }
+
+
+def iter_song_chunks(songs, alphabet_index, order, chunk_size):
+    """Yield lists of song pieces holding at most chunk_size new items in total.
+
+    Each piece is a tuple (indexes, num_context, starts_song). The first num_context indexes
+    repeat the end of the previous piece of the same song and were already counted.
+    """
+    chunk = []
+    chunk_items = 0
+
+    for song in songs:
+        items = iter(song)
+        context = []
+        starts_song = True
+
+        while True:
+            piece = [alphabet_index[item] for item in islice(items, chunk_size - chunk_items)]
+            if not piece:
+                break
+
+            chunk.append((np.array(context + piece, dtype=np.int64), len(context), starts_song))
+            chunk_items += len(piece)
+            starts_song = False
+            context = (context + piece)[-order:] if order > 0 else []
+
+            if chunk_items >= chunk_size:
+                yield chunk
+                chunk = []
+                chunk_items = 0
+
+    if chunk:
+        yield chunk
+
+
+def count_chunk(chunk, order, alphabet_length):
+    """Count the n-grams of every order in a chunk of song pieces.
+
+    n-grams are encoded as base alphabet_length integers, which is also their flat index
+    in the dense matrices of build_transition_matrix.
+    """
+    piece_lengths = np.array([len(indexes) for indexes, _, _ in chunk], dtype=np.int64)
+    piece_starts = np.cumsum(piece_lengths) - piece_lengths
+
+    seq = np.concatenate([indexes for indexes, _, _ in chunk])
+    positions = np.arange(len(seq))
+    piece_end = np.repeat(piece_starts + piece_lengths, piece_lengths)
+    new_start = np.repeat(piece_starts + [num_context for _, num_context, _ in chunk], piece_lengths)
+
+    first_items = np.array([indexes[0] for indexes, _, starts_song in chunk if starts_song], dtype=np.int64)
+
+    padded = np.concatenate([seq, np.zeros(order, dtype=np.int64)])
+    codes = np.zeros(len(seq), dtype=np.int64)
+
+    results = {
+        'p_starting_symbol': np.bincount(first_items, minlength=alphabet_length),
+        'N': np.zeros(order + 1, dtype=np.int64),
+        'runs': [None] * (order + 1)
+    }
+
+    for cur_order in range(order + 1):
+        codes = codes * alphabet_length + padded[cur_order:cur_order + len(seq)]
+
+        # the n-gram must fit in its piece and end after the items counted with the previous piece
+        end = positions + cur_order
+        valid = (end < piece_end) & (end >= new_start)
+        results['N'][cur_order] = np.count_nonzero(valid)
+
+        if cur_order == 0:
+            results['unigram_counts'] = np.bincount(seq[valid], minlength=alphabet_length)
+        else:
+            unique_codes, counts = np.unique(codes[valid], return_counts=True)
+            results['runs'][cur_order] = (unique_codes, counts.astype(np.int64))
+
+    return results
+
+
+def combine_runs(runs):
+    """Combine several (codes, counts) runs into one sorted run without duplicate codes."""
+    codes = np.concatenate([run_codes for run_codes, _ in runs])
+    counts = np.concatenate([run_counts for _, run_counts in runs])
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    return unique_codes, np.bincount(inverse, weights=counts, minlength=len(unique_codes)).astype(np.int64)
+
+
+def run_nbytes(run):
+    codes, counts = run
+    return codes.nbytes + counts.nbytes
+
+
+def merge_runs(runs, block_size=1_000_000):
+    """Merge sorted runs, each an array of shape (2, n) of codes and counts, block by block.
+
+    Every step takes the codes up to the smallest code found block_size entries ahead in any
+    run, so at most block_size entries of each run are read into memory at once.
+    """
+    positions = [0] * len(runs)
+
+    while True:
+        remaining = [idx for idx, run in enumerate(runs) if positions[idx] < run.shape[1]]
+        if not remaining:
+            return
+
+        upper = min(
+            runs[idx][0, min(positions[idx] + block_size, runs[idx].shape[1]) - 1]
+            for idx in remaining
+        )
+
+        block = []
+        for idx in remaining:
+            run = runs[idx]
+            stop = positions[idx] + int(np.searchsorted(run[0, positions[idx]:], upper, side='right'))
+            block.append((np.asarray(run[0, positions[idx]:stop]), np.asarray(run[1, positions[idx]:stop])))
+            positions[idx] = stop
+
+        yield combine_runs(block)
+
+
+def build_sparse_occurrence_mat(runs, cur_order, alphabet_length):
+    """Build a SparseOccurrenceMat holding every context of the (cur_order+1)-grams of the sorted runs.
+
+    The runs are merged twice with merge_runs, once to collect the contexts and once to add
+    the counts of each block to the uint32 rows and cols, so that only one merged block is
+    held in memory besides the matrices.
+    """
+    context_blocks = []
+    for codes, _ in merge_runs(runs):
+        prefix_codes = codes // alphabet_length
+        suffix_codes = codes % alphabet_length ** cur_order
+        context_blocks.append(np.union1d(prefix_codes, suffix_codes))
+        # suffixes repeat across blocks, deduplicate once they double the contexts found so far
+        if sum(len(block) for block in context_blocks[1:]) > max(len(context_blocks[0]), 1):
+            context_blocks = [np.unique(np.concatenate(context_blocks))]
+
+    if context_blocks:
+        context_codes = np.unique(np.concatenate(context_blocks))
+    else:
+        context_codes = np.zeros(0, dtype=np.int64)
+    del context_blocks
+
+    num_contexts = len(context_codes)
+    rows = np.zeros((num_contexts, alphabet_length), dtype=np.uint32)
+    cols = np.zeros((num_contexts, alphabet_length), dtype=np.uint32)
+
+    for codes, counts in merge_runs(runs):
+        prefix_codes, last_symbols = np.divmod(codes, alphabet_length)
+        first_symbols, suffix_codes = np.divmod(codes, alphabet_length ** cur_order)
+        counts = counts.astype(np.uint32)
+
+        np.add.at(rows, (np.searchsorted(context_codes, prefix_codes), last_symbols), counts)
+        np.add.at(cols, (np.searchsorted(context_codes, suffix_codes), first_symbols), counts)
+
+    contexts = np.zeros((num_contexts, cur_order), dtype=np.int64)
+    remainder = context_codes
+    for position in range(cur_order - 1, -1, -1):
+        remainder, contexts[:, position] = np.divmod(remainder, alphabet_length)
+
+    return SparseOccurrenceMat(alphabet_length, contexts, rows, cols)
@@ -0,0 +1,67 @@
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class FitStats:
+    """Collect per-stage timings and counters while a PST is being fit.
+
+    Stages are recorded as a dictionary of the form
+        {stage_name: {'wall_time': seconds, 'memory_allocated': bytes, 'memory_peak': bytes}}
+    and counters as a flat dictionary of name -> value.
+
+    Args:
+        callback (callable): optional hook called as callback(stage_name, record) each time
+            a stage finishes. The record is the counters dictionary merged with the stage timings.
+        trace_memory (bool): measure memory with tracemalloc (default: True). Tracing memory
+            slows allocation heavy code down, disable it if only wall times are needed.
+    """
+
+    def __init__(self, callback=None, trace_memory=True):
+        self.stages = {}
+        self.counters = {}
+        self.callback = callback
+        self.trace_memory = trace_memory
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block and record it under `name`."""
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            memory_start, _ = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            record = {'wall_time': time.perf_counter() - start}
+
+            if self.trace_memory:
+                memory_end, memory_peak = tracemalloc.get_traced_memory()
+                record['memory_allocated'] = memory_end - memory_start
+                record['memory_peak'] = memory_peak - memory_start
+                if started_tracing:
+                    tracemalloc.stop()
+
+            self.stages[name] = record
+
+            if self.callback is not None:
+                self.callback(name, {**self.counters, **record})
+
+    def as_dict(self):
+        """Return the collected statistics as plain dictionaries."""
+        return {
+            'stages': {name: dict(record) for name, record in self.stages.items()},
+            'counters': dict(self.counters)
+        }
+
+
+def maybe_stage(stats, name):
+    """Return stats.stage(name), or a no-op context manager when stats is None."""
+    if stats is None:
+        return nullcontext()
+    return stats.stage(name)
@@ -0,0 +1,130 @@
+from typing import Dict, List
+import numpy as np
+from pypst.pst_learn import resolve_n_jobs
+from pypst.transition_mat import build_alphabet_from_dataset, build_transition_matrix
+
+
+def information_from_counts(occurrence_mats : List[np.ndarray], base : float = None) -> Dict:
+    """Compute entropies and mutual informations of every order from the n-gram counts.
+
+    Inputs:
+        occurrence_mats (List[np.ndarray]) - the dense counts returned by build_transition_matrix,
+            occurrence_mats[k] counting the (k+1)-grams
+        base (float) - base of the logarithm (default: e, the measures are in nats)
+
+    Outputs:
+        a dictionary of arrays, indexed by the order k = 0..L
+        conditional_entropy - H(X | previous k symbols)
+        context_entropy - list, the entropy of the next symbol after each context of length k,
+            an array of shape (A,)*k. NaN for contexts that were never observed
+        context_probability - list, the probability of each context of length k, same shape
+        block_entropy - H(X_1..X_k+1) of the (k+1)-grams
+        entropy_rate - block_entropy / (k+1), an upper bound of the entropy rate that
+            converges to it from above, like conditional_entropy
+        mutual_information - I(X_t; X_t-k) of a symbol and the one k steps earlier,
+            mutual_information[0] being H(X)
+    """
+    if not all(isinstance(mat, np.ndarray) for mat in occurrence_mats):
+        raise ValueError("Information measures require the dense counts of build_transition_matrix (without p_min).")
+
+    log = np.log if base is None else lambda x: np.log(x) / np.log(base)
+
+    alphabet_length = occurrence_mats[0].shape[0]
+    order = len(occurrence_mats) - 1
+
+    results = {
+        'conditional_entropy': np.zeros(order + 1),
+        'context_entropy': [],
+        'context_probability': [],
+        'block_entropy': np.zeros(order + 1),
+        'entropy_rate': np.zeros(order + 1),
+        'mutual_information': np.zeros(order + 1)
+    }
+
+    for k, mat in enumerate(occurrence_mats):
+        counts = mat.reshape(-1, alphabet_length).astype(np.float64)
+        total = counts.sum()
+
+        context_totals = counts.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p_next = counts / context_totals[:, np.newaxis]
+            context_entropy = -np.sum(np.where(counts > 0, p_next * log(p_next), 0), axis=1)
+        context_entropy[context_totals == 0] = np.nan
+        context_probability = context_totals / total if total else np.zeros_like(context_totals)
+
+        results['context_entropy'].append(context_entropy.reshape((alphabet_length,) * k))
+        results['context_probability'].append(context_probability.reshape((alphabet_length,) * k))
+        observed = context_totals > 0
+        results['conditional_entropy'][k] = np.sum(context_probability[observed] * context_entropy[observed])
+
+        results['block_entropy'][k] = entropy_of_counts(counts, log)
+        results['entropy_rate'][k] = results['block_entropy'][k] / (k + 1)
+
+        # joint counts of the first and the last symbol of the (k+1)-grams
+        if k == 0:
+            joint = np.diag(counts[0])
+        else:
+            joint = mat.reshape(alphabet_length, -1, alphabet_length).sum(axis=1, dtype=np.float64)
+        results['mutual_information'][k] = (
+            entropy_of_counts(joint.sum(axis=1), log)
+            + entropy_of_counts(joint.sum(axis=0), log)
+            - entropy_of_counts(joint, log)
+        )
+
+    return results
+
+
+def entropy_of_counts(counts, log=np.log):
+    """Entropy of the distribution proportional to counts (of any shape)."""
+    p = counts[counts > 0] / np.sum(counts)
+    return float(-np.sum(p * log(p)))
+
+
+def information_profiles(
+    datasets : Dict[str, List[List[str]]],
+    order : int,
+    alphabet : List[str] = None,
+    base : float = None,
+    n_jobs : int = 1
+) -> Dict[str, Dict]:
+    """Count and compute information_from_counts for several datasets, e.g. pre and post lesion.
+
+    The datasets share one alphabet, so that the per context arrays line up.
+
+    Inputs:
+        datasets (Dict[str, List[List[str]]]) - songs of each dataset, by name
+        order (int) - the largest order k
+        alphabet (List[str]) - the list of items (default: the items of all datasets)
+        base (float) - base of the logarithm (default: e)
+        n_jobs (int) - number of processes, -1 for one per CPU. Each dataset is handled by one process
+
+    Outputs:
+        the results of information_from_counts by dataset name, each with its 'alphabet'
+    """
+    if alphabet is None:
+        alphabet = build_alphabet_from_dataset([song for songs in datasets.values() for song in songs])
+
+    n_jobs = resolve_n_jobs(n_jobs)
+
+    names = list(datasets)
+    if n_jobs == 1 or len(names) == 1:
+        profiles = [dataset_information(datasets[name], order, alphabet, base) for name in names]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(names))) as executor:
+            profiles = list(executor.map(
+                dataset_information,
+                [datasets[name] for name in names],
+                [order] * len(names),
+                [alphabet] * len(names),
+                [base] * len(names)))
+
+    return dict(zip(names, profiles))
+
+
+def dataset_information(dataset, order, alphabet, base=None):
+    counts = build_transition_matrix(dataset, order, alphabet=alphabet)
+    results = information_from_counts(counts['occurrence_mats'], base=base)
+    results['alphabet'] = counts['alphabet']
+    return results
@@ -0,0 +1,218 @@
+"""Read and write the .mat files of the MATLAB PST toolbox (pst_build_trans_mat, pst_learn).
+
+Songs are cell arrays of strings, one string per song and one character per syllable, or
+character matrices padded with trailing spaces as written by scipy.io.savemat from a list of
+strings. Counts are the F_MAT, ALPHABET, N and PI outputs of pst_build_trans_mat. Trees are
+the TREE struct arrays of pst_learn, read by pst_convert_to_pfa and pst_export_to_cytoscape:
+one struct per depth holding its nodes as matrix columns, see save_tree_mat. Indexes (the
+string of a node, its parent) are one based in the .mat files.
+
+scipy is imported on first use.
+"""
+from typing import Dict, Iterable, Iterator, List
+import numpy as np
+
+TREE_FIELDS = ('string', 'parent', 'label', 'internal', 'g_sigma_s', 'p', 'f')
+
+
+def iter_songs_mat(path : str, variable_names : Iterable[str] = None) -> Iterator[List[str]]:
+    """Yield the songs stored in a .mat file, reading one variable at a time.
+
+    Inputs:
+        path (str) - the .mat file
+        variable_names (Iterable[str]) - the variables holding songs (default: all of them)
+
+    Outputs:
+        each song as a list of syllables, without the padding spaces of character matrices
+    """
+    import scipy.io
+
+    if variable_names is None:
+        variable_names = [name for name, _, _ in scipy.io.whosmat(path)]
+
+    for name in variable_names:
+        contents = scipy.io.loadmat(path, variable_names=[name])
+        if name not in contents:
+            raise ValueError(f"Variable {name!r} not found in {path}.")
+
+        value = contents[name]
+        if value.dtype == object:
+            for cell in value.ravel(order='F'):
+                yield cell_to_song(cell)
+        else:
+            for song in value.ravel(order='F'):
+                yield list(str(song).rstrip(' '))
+
+
+def load_songs_mat(path : str, variable_names : Iterable[str] = None) -> List[List[str]]:
+    """Return the songs stored in a .mat file as a list, see iter_songs_mat."""
+    return list(iter_songs_mat(path, variable_names))
+
+
+def save_songs_mat(path : str, songs : List[List[str]], variable_name : str = 'songs'):
+    """Save songs as a 1 x n cell array, ready to be passed to pst_build_trans_mat.
+
+    Songs of single character syllables are saved as strings. Otherwise each song is a cell
+    array of syllable strings.
+    """
+    import scipy.io
+
+    single_characters = all(len(str(syllable)) == 1 for song in songs for syllable in song)
+
+    cells = np.empty((1, len(songs)), dtype=object)
+    for idx, song in enumerate(songs):
+        if single_characters:
+            cells[0, idx] = ''.join(str(syllable) for syllable in song)
+        else:
+            cells[0, idx] = np.array([str(syllable) for syllable in song], dtype=object).reshape(1, -1)
+
+    scipy.io.savemat(path, {variable_name: cells})
+
+
+def cell_to_song(cell):
+    """Convert one cell of a songs cell array (a string or a cell array of syllables)."""
+    if cell.dtype == object:
+        return [str(np.asarray(syllable).ravel()[0]).rstrip(' ') for syllable in cell.ravel(order='F')]
+
+    if cell.size == 0:
+        return []
+    return list(''.join(str(row).rstrip(' ') for row in cell.ravel(order='F')))
+
+
+def save_counts_mat(path : str, counts : Dict):
+    """Save the output of build_transition_matrix as F_MAT, ALPHABET, N and PI.
+
+    Sparse count matrices (see build_pruned_transition_matrix) are written dense, as the MATLAB
+    toolbox expects.
+    """
+    import scipy.io
+
+    f_mat = np.empty((1, len(counts['occurrence_mats'])), dtype=object)
+    for order, mat in enumerate(counts['occurrence_mats']):
+        f_mat[0, order] = to_dense(mat)
+
+    scipy.io.savemat(path, {
+        'F_MAT': f_mat,
+        'ALPHABET': alphabet_to_mat(counts['alphabet']),
+        'N': np.asarray(counts['N']),
+        'PI': np.asarray(counts['p_starting_symbol'])
+    })
+
+
+def load_counts_mat(path : str) -> Dict:
+    """Load F_MAT, ALPHABET, N and PI, as returned by build_transition_matrix."""
+    import scipy.io
+
+    contents = scipy.io.loadmat(path, variable_names=['F_MAT', 'ALPHABET', 'N', 'PI'])
+    alphabet = alphabet_from_mat(contents['ALPHABET'])
+    alphabet_length = len(alphabet)
+
+    # F_MAT{1} is a row vector, the higher orders keep their shape
+    occurrence_mats = [
+        np.asarray(mat).reshape((alphabet_length,) * (order + 1))
+        for order, mat in enumerate(contents['F_MAT'].ravel(order='F'))
+    ]
+
+    return {
+        "occurrence_mats": occurrence_mats,
+        "p_starting_symbol": contents['PI'].ravel(),
+        "alphabet": alphabet,
+        "N": contents['N'].ravel()
+    }
+
+
+def save_tree_mat(path : str, tree : List[Dict], alphabet : List[str]):
+    """Save a tree array returned by pst_learn as the TREE struct array of the MATLAB toolbox, with ALPHABET.
+
+    TREE(i) holds the nodes of depth i-1 as columns: string is a (i-1) x n matrix of alphabet
+    indexes, parent a 2 x n matrix of (node index, depth index) of each parent in TREE, label a
+    cell array, g_sigma_s a |ALPHABET| x n matrix, and internal, p and f row vectors. p and f are
+    the probability and count of each context, the sums of the next symbol rows pypst keeps.
+    Indexes are one based, the parent of the root is [0; 0].
+    """
+    import scipy.io
+
+    tree_mat = np.empty((1, len(tree)), dtype=[(field, object) for field in TREE_FIELDS])
+
+    for depth, level in enumerate(tree):
+        num_nodes = len(level['string'])
+
+        labels = np.empty((1, num_nodes), dtype=object)
+        for j, label in enumerate(level['label']):
+            labels[0, j] = label if isinstance(label, str) else ''.join(str(symbol) for symbol in label)
+
+        parents = np.array(level['parent'], dtype=float).reshape(num_nodes, 2).T + 1
+        if depth == 0:
+            parents[:] = 0
+
+        tree_mat['string'][0, depth] = np.array(level['string'], dtype=float).reshape(num_nodes, depth).T + 1
+        tree_mat['parent'][0, depth] = parents
+        tree_mat['label'][0, depth] = labels
+        tree_mat['internal'][0, depth] = np.array(level['internal'], dtype=float).reshape(1, num_nodes)
+        tree_mat['g_sigma_s'][0, depth] = np.array(
+            level['g_sigma_s'], dtype=float).reshape(num_nodes, len(alphabet)).T
+        for field in ('p', 'f'):
+            tree_mat[field][0, depth] = np.array(
+                [np.sum(value) for value in level[field]], dtype=float).reshape(1, num_nodes)
+
+    scipy.io.savemat(path, {'TREE': tree_mat, 'ALPHABET': alphabet_to_mat(alphabet)})
+
+
+def load_tree_mat(path : str):
+    """Load a TREE struct array of the MATLAB toolbox (pst_learn) and its ALPHABET, see save_tree_mat.
+
+    Returns:
+        tuple: the tree array, as returned by pst_learn, and the alphabet. p and f hold the
+        probability and count of each context, as in the .mat file.
+    """
+    import scipy.io
+
+    contents = scipy.io.loadmat(path, variable_names=['TREE', 'ALPHABET'])
+    alphabet = alphabet_from_mat(contents['ALPHABET'])
+
+    tree = []
+    for depth, level_mat in enumerate(contents['TREE'].ravel(order='F')):
+        internal = np.asarray(level_mat['internal']).ravel()
+        num_nodes = len(internal)
+
+        strings = np.asarray(level_mat['string']).reshape(depth, num_nodes, order='F').T.astype(int) - 1
+        parents = np.asarray(level_mat['parent']).reshape(2, num_nodes, order='F').T.astype(int) - 1
+        g_sigma_s = np.asarray(level_mat['g_sigma_s'], dtype=float).reshape(len(alphabet), num_nodes, order='F').T
+
+        level = {
+            'string': strings.tolist(),
+            # the root has no parent, pypst points it to itself
+            'parent': [(0, 0)] * num_nodes if depth == 0 else [tuple(parent) for parent in parents.tolist()],
+            'label': ['epsilon' if depth == 0 else [alphabet[index] for index in string] for string in strings],
+            'internal': [int(value) for value in internal],
+            'g_sigma_s': list(g_sigma_s),
+            'p': np.asarray(level_mat['p'], dtype=float).ravel().tolist(),
+            'f': np.asarray(level_mat['f'], dtype=float).ravel().tolist()
+        }
+
+        tree.append(level)
+
+    return tree, alphabet
+
+
+def to_dense(mat):
+    """Return a dense copy of a SparseOccurrenceMat, or the matrix itself when it is dense."""
+    if isinstance(mat, np.ndarray):
+        return mat
+
+    dense = np.zeros(mat.shape, dtype=mat.dtype)
+    dense[tuple(np.asarray(mat.contexts).T)] = mat.rows
+    return dense
+
+
+def alphabet_to_mat(alphabet):
+    """A character array when every symbol is a single character, a cell array of strings otherwise."""
+    if all(len(str(symbol)) == 1 for symbol in alphabet):
+        return ''.join(str(symbol) for symbol in alphabet)
+    return np.array([str(symbol) for symbol in alphabet], dtype=object).reshape(1, -1)
+
+
+def alphabet_from_mat(value):
+    if value.dtype == object:
+        return [str(np.asarray(symbol).ravel()[0]) for symbol in value.ravel(order='F')]
+    return list(''.join(str(row) for row in value.ravel()))
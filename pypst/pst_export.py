@@ -1,4 +1,5 @@
 import os
+import json
 import numpy as np
 import math
 
@@ -38,13 +39,13 @@ def pst_export_to_cytoscape(TREE, ALPHABET, **kwargs):
         # Iterate over TREE to write .sif and .noa files
         for i in range(len(TREE) - 1):
             for j in range(len(TREE[i]['label'])):
-                source = TREE[i]['label'][j]
+                source = format_label(TREE[i]['label'][j])
 
                 if not TREE[i + 1]['parent']:
                     continue
 
-                target_idxs = [idx for idx, parent in enumerate(TREE[i + 1]['parent'][0]) if parent == j]
-                target_labels = [TREE[i + 1]['label'][idx] for idx in target_idxs]
+                target_idxs = [idx for idx, (parent, _) in enumerate(TREE[i + 1]['parent']) if parent == j]
+                target_labels = [format_label(TREE[i + 1]['label'][idx]) for idx in target_idxs]
 
                 sif_file.write(f"{source} trans")
                 for target in target_labels:
@@ -69,6 +70,7 @@ def pst_export_to_cytoscape(TREE, ALPHABET, **kwargs):
         # Iterate again for .noa file and node chart script
         for i, node in enumerate(TREE):
             for j, label in enumerate(node['label']):
+                label = format_label(label)
                 cscript_file.write(f'nodecharts pie nodelist="{label}"')
 
                 noa_gsigma_file.write(f"{label}\t")
@@ -76,7 +78,7 @@ def pst_export_to_cytoscape(TREE, ALPHABET, **kwargs):
                 colorlist = ''
                 valuelist = ''
 
-                for k, value in enumerate(node['g_sigma_s'][:, j]):
+                for k, value in enumerate(node['g_sigma_s'][j]):
                     noa_gsigma_file.write(f"{value:.2f}\t")
 
                     if value > thresh:
@@ -93,9 +95,53 @@ def pst_export_to_cytoscape(TREE, ALPHABET, **kwargs):
                 cscript_file.write(f' valuelist="{valuelist.strip(",")}"')
                 cscript_file.write(f' colorlist="{colorlist.strip(",")}"\n')
 
-                noa_gsigma_file.write(f"{node['f'][j]:g}\t{math.log(node['f'][j]):g}\t{i - 1}")
+                # pst_learn stores the next symbol counts of each node, the root has none
+                frequency = float(np.sum(node['f'][j]))
+                log_frequency = math.log(frequency) if frequency > 0 else float('-inf')
+                noa_gsigma_file.write(f"{frequency:g}\t{log_frequency:g}\t{i}")
 
                 if internal_flag:
                     noa_gsigma_file.write(f"\t{node['internal'][j]}")
 
                 noa_gsigma_file.write("\n")
+
+
+def pst_export_to_json(TREE, ALPHABET, path):
+    """
+    pst_export_to_json writes a PST computed by pst_learn to a JSON file.
+
+    The file holds the alphabet and one entry per node with its depth, string (indexes in
+    the alphabet), label, parent (index and depth), internal flag, next symbol distribution
+    g_sigma_s, probability p and counts f. The root has no counts, its p and f are numbers.
+
+    Parameters:
+    TREE : list
+        Structure array returned by pst_learn
+    ALPHABET : list or str
+        Mapping of phrase identities to rows/columns in frequency table
+    path : str
+        File to write
+    """
+    nodes = []
+    for depth, level in enumerate(TREE):
+        for j in range(len(level['string'])):
+            nodes.append({
+                'depth': depth,
+                'string': [int(symbol) for symbol in level['string'][j]],
+                'label': format_label(level['label'][j]),
+                'parent': [int(value) for value in level['parent'][j]],
+                'internal': int(level['internal'][j]),
+                'g_sigma_s': np.asarray(level['g_sigma_s'][j]).tolist(),
+                'p': np.asarray(level['p'][j]).tolist(),
+                'f': np.asarray(level['f'][j]).tolist()
+            })
+
+    with open(path, 'w') as fp:
+        json.dump({'alphabet': list(ALPHABET), 'nodes': nodes}, fp)
+
+
+def format_label(label):
+    """Join the symbols of a node label (a list for every node but the 'epsilon' root)."""
+    if isinstance(label, str):
+        return label
+    return ''.join(str(symbol) for symbol in label)
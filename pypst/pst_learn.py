@@ -1,5 +1,11 @@
+import heapq
+import os
 import numpy as np
 from collections import deque
+from itertools import compress, repeat
+from pypst.fit_stats import maybe_stage
+
+LEARN_MODES = ('sequential', 'level', 'best_first')
 
 def pst_learn(
     f_mat,
@@ -10,7 +16,12 @@ def pst_learn(
     g_min=0.185,
     r=1.6,
     alpha=17.5,
-    p_smoothing=0
+    p_smoothing=0,
+    mode='sequential',
+    n_jobs=1,
+    max_nodes=None,
+    decisions=None,
+    stats=None
 ):
     """
     PST Learn function based on Ron, Singer, and Tishby's 1996 algorithm "The Power of Amnesia".
@@ -26,18 +37,200 @@ def pst_learn(
         r (float): Minimum divergence (default: 1.8).
         alpha (float): Smoothing parameter (default: 0).
         p_smoothing (float): Smoothing for probability (default: 0).
+        mode (str): How candidate contexts are evaluated (default: 'sequential').
+            'sequential' evaluates one candidate at a time from a FIFO queue.
+            'level' evaluates all candidates of the same depth at once with matrix operations.
+            Both modes produce the same tree.
+            'best_first' expands the most probable candidate first and stops once the tree
+            would grow beyond max_nodes.
+        n_jobs (int): Number of worker processes (default: 1). With more than one, the subtree
+            below each first symbol is learned in its own process using the 'level' mode and
+            the partial trees are merged. -1 uses all CPUs.
+        max_nodes (int): Maximum number of nodes in the returned tree, counting the root and the
+            internal nodes added by fix_path (default: None, no limit). Requires mode='best_first'.
+        decisions (dict): optional dictionary filled with {context: accepted} for every candidate
+            context tested, the context being a tuple of alphabet indexes. See pst_update.
+        stats (FitStats): optional collector for stage timings and counters (default: None).
 
     Returns:
         list: A tree array representing the probabilistic suffix tree.
     """
 
+    if mode not in LEARN_MODES:
+        raise ValueError(f"Unknown learning mode '{mode}'. Expected one of {LEARN_MODES}.")
+
+    n_jobs = resolve_n_jobs(n_jobs)
+
+    if max_nodes is not None and mode != 'best_first':
+        raise ValueError("max_nodes is only supported with mode='best_first'.")
+
+    if mode == 'best_first' and n_jobs != 1:
+        raise ValueError("mode='best_first' can not be combined with n_jobs.")
+
     # Initialize sbar: symbols whose probability >= p_min
-    sequence_queue_sbar = [
-        [value] for alphabet_index, value in enumerate(alphabet)
+    root_indexes = [
+        alphabet_index for alphabet_index in range(len(alphabet))
+        if np.single(f_mat[0][alphabet_index] / N[0]) >= p_min
+    ]
+
+    tbar = init_tree(L)
+    counters = {'candidates_evaluated': 0, 'queue_peak': 0}
+
+    # Learning process
+    with maybe_stage(stats, 'expand'):
+        if n_jobs != 1:
+            accepted = learn_subtrees_parallel(
+                f_mat, N, root_indexes,
+                L=L, p_min=p_min, g_min=g_min, r=r, alpha=alpha, n_jobs=n_jobs, counters=counters,
+                decisions=decisions)
+            add_accepted_nodes(tbar, accepted, alphabet)
+        elif mode == 'sequential':
+            learn_sequential(
+                tbar, f_mat, alphabet, N, root_indexes,
+                L=L, p_min=p_min, g_min=g_min, r=r, alpha=alpha, counters=counters,
+                decisions=decisions)
+        elif mode == 'best_first':
+            accepted = learn_best_first(
+                f_mat, N, root_indexes,
+                L=L, p_min=p_min, g_min=g_min, r=r, alpha=alpha, max_nodes=max_nodes, counters=counters,
+                decisions=decisions)
+            add_accepted_nodes(tbar, accepted, alphabet)
+        else:
+            candidates = np.array(root_indexes, dtype=np.intp).reshape(-1, 1)
+            accepted = learn_levels(
+                f_mat, N, candidates,
+                L=L, p_min=p_min, g_min=g_min, r=r, alpha=alpha, counters=counters,
+                decisions=decisions)
+            add_accepted_nodes(tbar, accepted, alphabet)
+
+        if stats is not None:
+            stats.counters.update(counters)
+            stats.counters['accepted_per_depth'] = [len(level['string']) for level in tbar]
+
+    # Post-process the tree
+    with maybe_stage(stats, 'fix_path'):
+        tbar = fix_path(tbar, stats=stats)
+
+    with maybe_stage(stats, 'g_sigma'):
+        tbar = find_gsigma(tbar, f_mat, g_min, N, p_smoothing)
+
+    return tbar
+
+
+def pst_update(
+    tbar,
+    f_mat,
+    alphabet,
+    N,
+    changed,
+    decisions,
+    L=7,
+    p_min=0.0073,
+    g_min=0.185,
+    r=1.6,
+    alpha=17.5,
+    p_smoothing=0,
+    stats=None
+):
+    """
+    Update a tree learned by pst_learn after counts were added to f_mat and N.
+
+    A context is accepted or rejected from its own next symbol counts and those of its suffix,
+    so only the contexts where either changed are tested again, every other decision is reused.
+    Whether a context is a candidate at all depends on N, which grows with every song, so the
+    cheap p_min expansion test still runs for all candidates. When the same contexts are
+    accepted as before, tbar is patched in place: the distributions of the nodes whose counts
+    changed are recomputed and p is rescaled for the new N. Otherwise the tree is rebuilt from
+    the accepted contexts. Either way the result equals pst_learn on the updated counts.
+
+    Args:
+        tbar (list): The tree array returned by pst_learn (or pst_update) for the previous counts.
+        f_mat (list): The updated frequency tables.
+        alphabet (str): String of symbols.
+        N (list): The updated total entries per order.
+        changed (list): For each depth d, the set of contexts (tuples of d alphabet indexes) whose
+            next symbol counts changed. Depth 0 holds the empty tuple if the root counts changed.
+        decisions (dict): The decisions recorded by pst_learn for the previous counts, updated in place.
+
+        L, p_min, g_min, r, alpha, p_smoothing: the parameters tbar was learned with, see pst_learn.
+        stats (FitStats): optional collector for stage timings and counters (default: None).
+
+    Returns:
+        list: The updated tree array.
+    """
+
+    # a decision is stale once the counts of the context or of its suffix changed
+    for cur_depth, contexts in enumerate(changed):
+        for context in contexts:
+            decisions.pop(context, None)
+            for alphabet_index in range(len(alphabet)):
+                decisions.pop((alphabet_index,) + context, None)
+
+    root_indexes = [
+        alphabet_index for alphabet_index in range(len(alphabet))
         if np.single(f_mat[0][alphabet_index] / N[0]) >= p_min
     ]
 
-    # Initialize tree with empty node
+    counters = {'candidates_evaluated': 0, 'candidates_retested': 0}
+    accepted = [np.zeros((0, depth), dtype=np.intp) for depth in range(L + 1)]
+
+    with maybe_stage(stats, 'expand'):
+        candidates = np.array(root_indexes, dtype=np.intp).reshape(-1, 1)
+        cur_depth = 1
+        while len(candidates) > 0 and cur_depth <= L:
+            keys = list(map(tuple, candidates.tolist()))
+            retest = np.array([key not in decisions for key in keys], dtype=bool)
+            passed = np.array([decisions.get(key, False) for key in keys], dtype=bool)
+
+            if np.any(retest):
+                passed[retest] = test_contexts(f_mat, candidates[retest], g_min=g_min, r=r, alpha=alpha)
+                decisions.update(zip(compress(keys, retest), passed[retest].tolist()))
+
+            counters['candidates_evaluated'] += len(candidates)
+            counters['candidates_retested'] += int(np.sum(retest))
+            accepted[cur_depth] = candidates[passed]
+
+            if cur_depth == L:
+                break
+
+            candidates = extend_contexts(f_mat, N, candidates, p_min=p_min)
+            cur_depth += 1
+
+        previously_accepted = [
+            [string for string, internal in zip(level['string'], level['internal']) if not internal]
+            for level in tbar
+        ]
+        counters['tree_patched'] = all(
+            previously_accepted[depth] == accepted[depth].tolist() for depth in range(1, L + 1))
+
+        if stats is not None:
+            stats.counters.update(counters)
+
+    if counters['tree_patched']:
+        with maybe_stage(stats, 'g_sigma'):
+            for i, level in enumerate(tbar):
+                for j, string in enumerate(level['string']):
+                    if tuple(string) in changed[i]:
+                        level['g_sigma_s'][j], level['p'][j], level['f'][j] = node_gsigma(
+                            string, f_mat, g_min, N, p_smoothing)
+                    elif string:
+                        level['p'][j] = level['f'][j] / N[i]
+        return tbar
+
+    tbar = init_tree(L)
+    add_accepted_nodes(tbar, accepted, alphabet)
+
+    with maybe_stage(stats, 'fix_path'):
+        tbar = fix_path(tbar, stats=stats)
+
+    with maybe_stage(stats, 'g_sigma'):
+        tbar = find_gsigma(tbar, f_mat, g_min, N, p_smoothing)
+
+    return tbar
+
+
+def init_tree(L):
+    """Return an empty tree array of depth L holding only the root (epsilon) node."""
     tbar = [
         {
             'string': [],
@@ -58,10 +251,18 @@ def pst_learn(
         'internal': [0],
     })
 
-    # Learning process
+    return tbar
+
+
+def learn_sequential(tbar, f_mat, alphabet, N, root_indexes, L, p_min, g_min, r, alpha, counters, decisions=None):
+    """Grow tbar by popping candidate contexts one at a time from a FIFO queue."""
+    sequence_queue_sbar = deque([alphabet[alphabet_index]] for alphabet_index in root_indexes)
+
     while sequence_queue_sbar:
+        counters['queue_peak'] = max(counters['queue_peak'], len(sequence_queue_sbar))
+
         # this is referred to as S_CHAR in the original code
-        cur_sequence = sequence_queue_sbar.pop(0)
+        cur_sequence = sequence_queue_sbar.popleft()
 
         # Convert the sequence to a list of alphabet indexes
         # this is referred to as S_INDEX in the original code
@@ -70,6 +271,7 @@ def pst_learn(
         if len(cur_sequence_indexes) == 0:
             continue
 
+        counters['candidates_evaluated'] += 1
         cur_depth = len(cur_sequence_indexes)
 
         f_vec = retrieve_f_sigma(f_mat, cur_sequence_indexes)
@@ -88,6 +290,9 @@ def pst_learn(
         ratio_test = (ratio >= r) | (ratio <= 1 / r)
         total = np.sum(ratio_test & psize)
 
+        if decisions is not None:
+            decisions[tuple(cur_sequence_indexes)] = bool(total > 0)
+
         if total > 0:
             if cur_depth < len(tbar):
                 tbar[cur_depth]['string'].append(cur_sequence_indexes)
@@ -106,11 +311,258 @@ def pst_learn(
                 new_sequence = [alphabet[j]] + cur_sequence
                 sequence_queue_sbar.append(new_sequence)
 
-    # Post-process the tree
-    tbar = fix_path(tbar)
-    tbar = find_gsigma(tbar, f_mat, g_min, N, p_smoothing)
 
-    return tbar
+def learn_levels(f_mat, N, candidates, L, p_min, g_min, r, alpha, counters, decisions=None):
+    """Evaluate candidate contexts one depth at a time with whole-matrix operations.
+
+    Each row of `candidates` is a context of alphabet indexes. All contexts of the current
+    depth are tested together: their next-symbol counts are gathered into a matrix and the
+    ratio, size and expansion tests of the sequential algorithm are applied to every row
+    at once. Candidates are kept in the same order the FIFO queue would visit them.
+
+    Returns:
+        list: accepted contexts per depth, as arrays of shape (n_accepted, depth).
+    """
+    accepted = [np.zeros((0, depth), dtype=np.intp) for depth in range(L + 1)]
+
+    cur_depth = candidates.shape[1]
+    while len(candidates) > 0 and cur_depth <= L:
+        counters['candidates_evaluated'] += len(candidates)
+        counters['queue_peak'] = max(counters['queue_peak'], len(candidates))
+
+        passed = test_contexts(f_mat, candidates, g_min=g_min, r=r, alpha=alpha)
+        accepted[cur_depth] = candidates[passed]
+
+        if decisions is not None:
+            decisions.update(zip(map(tuple, candidates.tolist()), passed.tolist()))
+
+        if cur_depth == L:
+            break
+
+        candidates = extend_contexts(f_mat, N, candidates, p_min=p_min)
+        cur_depth += 1
+
+    return accepted
+
+
+def test_contexts(f_mat, candidates, g_min, r, alpha):
+    """Apply the ratio and size tests to every row of candidates, all of the same depth."""
+    eps = np.finfo(float).eps
+    cur_depth = candidates.shape[1]
+
+    # rows of next-symbol counts for each context and for its suffix
+    f_vec = f_mat[cur_depth][tuple(candidates.T)]
+    if cur_depth > 1:
+        f_suf = f_mat[cur_depth - 1][tuple(candidates[:, 1:].T)]
+    else:
+        f_suf = f_mat[0][np.newaxis, :]
+
+    p_sigma_s = f_vec / (np.sum(f_vec, axis=1, keepdims=True) + eps)
+    p_sigma_suf = f_suf / (np.sum(f_suf, axis=1, keepdims=True) + eps)
+
+    ratio = (p_sigma_s + eps) / (p_sigma_suf + eps)
+    psize = p_sigma_s >= (1 + alpha) * g_min
+
+    ratio_test = (ratio >= r) | (ratio <= 1 / r)
+    return np.any(ratio_test & psize, axis=1)
+
+
+def extend_contexts(f_mat, N, candidates, p_min):
+    """Return the one symbol extensions of each row of candidates whose probability passes p_min."""
+    eps = np.finfo(float).eps
+    cur_depth = candidates.shape[1]
+
+    # counts of every one symbol extension of each context, shape (n_candidates, alphabet)
+    f_vec_prime = f_mat[cur_depth][(slice(None),) + tuple(candidates.T)].T
+    p_sigmaprime_s = f_vec_prime / (N[cur_depth] + eps)
+    rows, add_nodes = np.nonzero(p_sigmaprime_s >= p_min)
+
+    # Prepend the new symbols to their contexts
+    return np.concatenate([add_nodes[:, np.newaxis], candidates[rows]], axis=1)
+
+
+def learn_best_first(f_mat, N, root_indexes, L, p_min, g_min, r, alpha, max_nodes, counters, decisions=None):
+    """Evaluate candidate contexts in order of decreasing probability until max_nodes is reached.
+
+    Candidates are kept in a heap keyed by their empirical probability, the same quantity
+    compared against p_min. Accepting a context also commits the tree to every suffix of it,
+    which fix_path adds as internal nodes, so those are counted against the budget too.
+    Learning stops at the first accepted context that no longer fits.
+
+    Returns:
+        list: accepted contexts per depth, as arrays of shape (n_accepted, depth).
+    """
+    eps = np.finfo(float).eps
+
+    if max_nodes is not None and max_nodes < 1:
+        raise ValueError("max_nodes must be at least 1 to hold the root node.")
+
+    # (negative probability, insertion order, context) so ties pop in FIFO order
+    heap = [
+        (-(f_mat[0][alphabet_index] / N[0]), order, (alphabet_index,))
+        for order, alphabet_index in enumerate(root_indexes)
+    ]
+    heapq.heapify(heap)
+    pushed = len(heap)
+
+    tree_nodes = {()}
+    accepted = [[] for _ in range(L + 1)]
+    counters['budget_exhausted'] = False
+
+    while heap:
+        counters['queue_peak'] = max(counters['queue_peak'], len(heap))
+        _, _, context = heapq.heappop(heap)
+        counters['candidates_evaluated'] += 1
+        cur_depth = len(context)
+
+        f_vec = retrieve_f_sigma(f_mat, list(context))
+        f_suf = retrieve_f_sigma(f_mat, list(context[1:]))
+
+        p_sigma_s = f_vec / (np.sum(f_vec) + eps)
+        p_sigma_suf = f_suf / (np.sum(f_suf) + eps)
+
+        ratio = (p_sigma_s + eps) / (p_sigma_suf + eps)
+        psize = p_sigma_s >= (1 + alpha) * g_min
+
+        ratio_test = (ratio >= r) | (ratio <= 1 / r)
+        passed = bool(np.any(ratio_test & psize))
+
+        if decisions is not None:
+            decisions[context] = passed
+
+        if passed:
+            # a context already reserved as the suffix of a deeper node costs nothing more
+            new_nodes = []
+            for start in range(cur_depth):
+                if context[start:] in tree_nodes:
+                    break
+                new_nodes.append(context[start:])
+
+            if max_nodes is not None and len(tree_nodes) + len(new_nodes) > max_nodes:
+                counters['budget_exhausted'] = True
+                break
+
+            tree_nodes.update(new_nodes)
+            accepted[cur_depth].append(context)
+
+        if cur_depth < L:
+            f_vec_prime = retrieve_f_prime(f_mat, list(context))
+            p_sigmaprime_s = f_vec_prime / (N[cur_depth] + eps)
+
+            for j in np.where(p_sigmaprime_s >= p_min)[0]:
+                heapq.heappush(heap, (-p_sigmaprime_s[j], pushed, (int(j),) + context))
+                pushed += 1
+
+    return [
+        np.array(contexts, dtype=np.intp).reshape(len(contexts), depth)
+        for depth, contexts in enumerate(accepted)
+    ]
+
+
+def resolve_n_jobs(n_jobs):
+    """Return the number of worker processes for n_jobs, a positive integer or -1 for one per CPU."""
+    if n_jobs == -1:
+        return os.cpu_count()
+
+    if n_jobs < 1:
+        raise ValueError(f"n_jobs must be a positive integer or -1 (all CPUs), got {n_jobs!r}.")
+
+    return n_jobs
+
+
+def learn_subtrees_parallel(f_mat, N, root_indexes, L, p_min, g_min, r, alpha, n_jobs, counters, decisions=None):
+    """Run learn_levels for the subtree of each root symbol in a pool of processes.
+
+    A context and all of its suffixes end with the same symbol, so the subtree below each
+    first symbol can be grown from the read-only counts alone. The counts are written once
+    to .npy files which the workers memory map, then the accepted contexts of each subtree
+    are concatenated per depth in root order, which is the order learn_levels visits them.
+    """
+    # imported here, the process pool machinery is slow to import and only needed with n_jobs
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    n_jobs = resolve_n_jobs(n_jobs)
+
+    accepted = [np.zeros((0, depth), dtype=np.intp) for depth in range(L + 1)]
+    if len(root_indexes) == 0:
+        return accepted
+
+    # /dev/shm keeps the mapped counts in memory instead of on disk when it is available
+    tmp_root = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+    with tempfile.TemporaryDirectory(prefix='pypst_counts_', dir=tmp_root) as count_dir:
+        count_files = []
+        for order, mat in enumerate(f_mat):
+            if isinstance(mat, np.ndarray):
+                path = os.path.join(count_dir, f'f_mat_{order}.npy')
+                np.save(path, mat)
+                count_files.append(path)
+            else:
+                count_files.append(mat)
+
+        with ProcessPoolExecutor(
+            max_workers=min(n_jobs, len(root_indexes)),
+            initializer=_init_subtree_worker,
+            initargs=(count_files,)
+        ) as pool:
+            subtrees = list(pool.map(
+                _learn_subtree,
+                root_indexes,
+                repeat(N), repeat(L), repeat(p_min), repeat(g_min), repeat(r), repeat(alpha),
+                repeat(decisions is not None)))
+
+    for _, subtree_counters, subtree_decisions in subtrees:
+        counters['candidates_evaluated'] += subtree_counters['candidates_evaluated']
+        counters['queue_peak'] = max(counters['queue_peak'], subtree_counters['queue_peak'])
+        if decisions is not None:
+            decisions.update(subtree_decisions)
+
+    for depth in range(1, L + 1):
+        accepted[depth] = np.concatenate(
+            [subtree_accepted[depth] for subtree_accepted, _, _ in subtrees])
+
+    return accepted
+
+
+_worker_f_mat = None
+
+def _init_subtree_worker(count_files):
+    global _worker_f_mat
+    _worker_f_mat = [
+        np.load(path, mmap_mode='r') if isinstance(path, str) else path
+        for path in count_files
+    ]
+
+def _learn_subtree(root_index, N, L, p_min, g_min, r, alpha, record_decisions):
+    counters = {'candidates_evaluated': 0, 'queue_peak': 0}
+    decisions = {} if record_decisions else None
+    accepted = learn_levels(
+        _worker_f_mat, N, np.array([[root_index]], dtype=np.intp),
+        L=L, p_min=p_min, g_min=g_min, r=r, alpha=alpha, counters=counters, decisions=decisions)
+    return accepted, counters, decisions
+
+
+def add_accepted_nodes(tbar, accepted, alphabet):
+    """Append the accepted contexts of each depth to tbar and resolve their parents."""
+    for cur_depth in range(1, len(tbar)):
+        if cur_depth >= len(accepted):
+            break
+
+        parents = {}
+        for idx, string in enumerate(tbar[cur_depth - 1]['string']):
+            parents.setdefault(tuple(string), idx)
+
+        for string in accepted[cur_depth].tolist():
+            if cur_depth > 1 and tuple(string[1:]) in parents:
+                parent = (parents[tuple(string[1:])], cur_depth - 1)
+            else:
+                parent = (0, 0)
+
+            tbar[cur_depth]['string'].append(string)
+            tbar[cur_depth]['parent'].append(parent)
+            tbar[cur_depth]['label'].append([alphabet[i] for i in string])
+            tbar[cur_depth]['internal'].append(0)
 
 
 def find_parent(sequence, tbar):
@@ -126,7 +578,7 @@ def find_parent(sequence, tbar):
 
     return 0, 0
 
-def fix_path(tbar, max_iterations=1000):
+def fix_path(tbar, max_iterations=1000, stats=None):
     iteration = 0
     while iteration < max_iterations:
         changes = False
@@ -155,6 +607,11 @@ def fix_path(tbar, max_iterations=1000):
                     changes = True
         if not changes:
             break
+
+    if stats is not None:
+        stats.counters['fix_path_iterations'] = iteration
+        stats.counters['internal_per_depth'] = [sum(level['internal']) for level in tbar]
+
     return tbar
 
 
@@ -162,7 +619,9 @@ def retrieve_f_prime(f_mat, s):
     if len(s) == 0:
         return f_mat[1]
 
-    return np.squeeze(f_mat[len(s)][:, tuple(s)])
+    # index every axis after the first with one symbol of s, f_mat[k][:, tuple(s)]
+    # would instead select several entries along the second axis
+    return f_mat[len(s)][(slice(None),) + tuple(s)]
 
 def retrieve_f_sigma(f_mat, s):
     if len(s) == 0:
@@ -172,20 +631,25 @@ def retrieve_f_sigma(f_mat, s):
 def find_gsigma(tbar, f_mat, g_min, N, p_smoothing):
     for i in range(len(tbar)):
         for j in range(len(tbar[i].get('string', []))):
-            f_vec = retrieve_f_sigma(f_mat, tbar[i]['string'][j])
-            p_sigma_s = f_vec / (np.sum(f_vec) + np.finfo(float).eps)
-            if tbar[i]['string'][j]:
-                f = retrieve_f(f_mat, tbar[i]['string'][j])
-                p_s = f / N[len(tbar[i]['string'][j])]
-            else:
-                f, p_s = 0, 1
-            sigma_norm = len(p_sigma_s)
-            g_sigma_s = p_sigma_s * (1 - sigma_norm * g_min) + g_min
-            tbar[i]['g_sigma_s'].append(g_sigma_s if p_smoothing else p_sigma_s)
+            g_sigma_s, p_s, f = node_gsigma(tbar[i]['string'][j], f_mat, g_min, N, p_smoothing)
+            tbar[i]['g_sigma_s'].append(g_sigma_s)
             tbar[i]['p'].append(p_s)
             tbar[i]['f'].append(f)
     return tbar
 
+def node_gsigma(string, f_mat, g_min, N, p_smoothing):
+    """Return the next symbol distribution, p and f of the node for the context string."""
+    f_vec = retrieve_f_sigma(f_mat, string)
+    p_sigma_s = f_vec / (np.sum(f_vec) + np.finfo(float).eps)
+    if string:
+        f = retrieve_f(f_mat, string)
+        p_s = f / N[len(string)]
+    else:
+        f, p_s = 0, 1
+    sigma_norm = len(p_sigma_s)
+    g_sigma_s = p_sigma_s * (1 - sigma_norm * g_min) + g_min
+    return (g_sigma_s if p_smoothing else p_sigma_s), p_s, f
+
 def retrieve_f(f_mat, s):
     """
     Retrieve the frequency for a given sequence s from the frequency matrix f_mat.
@@ -0,0 +1,293 @@
+"""Serve likelihood and next symbol queries against fitted PSTs over a local socket.
+
+The protocol is one JSON object per line in both directions. Requests look like
+    {"id": 1, "op": "score", "model": "USA5288_pre", "sequences": [["A", "B"], ["C"]]}
+    {"id": 2, "op": "predict", "model": "USA5288_pre", "contexts": [["A", "B"]]}
+and are answered, possibly out of order, with
+    {"id": 1, "result": [-3.2, -1.1]}
+    {"id": 2, "result": [[0.1, 0.0, ...]]}
+or {"id": ..., "error": "message"}. Scores are natural log-likelihoods and a sequence with
+probability 0 scores -Infinity, as written by the json module.
+
+Models are loaded on first use (by default pickled PST instances named <model>.pkl in a
+directory) and kept in a least recently used cache bounded by the size of their automata.
+Concurrent requests against the same model are answered by a single vectorized call.
+
+Run with
+    python -m pypst.server --model-dir models/ --port 8765
+or --socket /tmp/pypst.sock for a unix socket.
+"""
+import argparse
+import asyncio
+import json
+import os
+import pickle
+from collections import OrderedDict
+
+
+def directory_loader(model_dir):
+    """Return a loader reading the pickled PST <model_dir>/<name>.pkl."""
+
+    def load(name):
+        if not name or os.path.basename(name) != name or name.startswith('.'):
+            raise ValueError(f"Invalid model name {name!r}.")
+
+        with open(os.path.join(model_dir, f'{name}.pkl'), 'rb') as fp:
+            return pickle.load(fp)
+
+    return load
+
+
+class ModelCache:
+    """Least recently used cache of SuffixAutomaton instances, bounded by their size in bytes.
+
+    Args:
+        loader (callable): called as loader(name) in a worker thread, returns a fitted PST.
+        max_memory (int): bytes of automata kept in memory. The most recently used model is
+            always kept, even if it alone is larger.
+    """
+
+    def __init__(self, loader, max_memory=512 * 2**20):
+        self.loader = loader
+        self.max_memory = max_memory
+        self.nbytes = 0
+        self.stats = {'loads': 0, 'evictions': 0}
+        self._automata = OrderedDict()
+        self._loading = {}
+
+    def __contains__(self, name):
+        return name in self._automata
+
+    async def get(self, name):
+        if name in self._automata:
+            self._automata.move_to_end(name)
+            return self._automata[name]
+
+        # concurrent requests for a model being loaded wait for the same load
+        if name not in self._loading:
+            self._loading[name] = asyncio.ensure_future(self._load(name))
+
+        return await asyncio.shield(self._loading[name])
+
+    async def _load(self, name):
+        try:
+            loop = asyncio.get_running_loop()
+            automaton = await loop.run_in_executor(None, lambda: self.loader(name).automaton)
+        finally:
+            del self._loading[name]
+
+        self.stats['loads'] += 1
+        self._automata[name] = automaton
+        self.nbytes += automaton.nbytes
+
+        while self.nbytes > self.max_memory and len(self._automata) > 1:
+            _, evicted = self._automata.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.stats['evictions'] += 1
+
+        return automaton
+
+
+class ModelServer:
+    """asyncio server answering score and predict requests, see the module documentation.
+
+    Args:
+        loader (callable): called as loader(name), returns a fitted PST. See directory_loader.
+        max_memory (int): bytes of models kept in the cache.
+    """
+
+    def __init__(self, loader, max_memory=512 * 2**20):
+        self.models = ModelCache(loader, max_memory=max_memory)
+        self.stats = {'requests': 0, 'batches': 0}
+        self._pending = {}
+        self._server = None
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """Listen on host:port, or on the unix socket at path when given."""
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host=host, port=port)
+        return self
+
+    @property
+    def address(self):
+        """The (host, port) or unix socket path the server listens on."""
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle_connection(self, reader, writer):
+        tasks = set()
+        lock = asyncio.Lock()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                # requests are answered concurrently, so that they can be batched
+                task = asyncio.ensure_future(self._answer(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def _answer(self, line, writer, lock):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            response = {'id': request_id, 'result': await self.handle(request)}
+        except Exception as e:
+            response = {'id': request_id, 'error': f'{type(e).__name__}: {e}'}
+
+        async with lock:
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+    async def handle(self, request):
+        """Answer a single request, given as a dictionary."""
+        op = request.get('op')
+        if op == 'ping':
+            return 'pong'
+
+        if op not in ('score', 'predict'):
+            raise ValueError(f"Unknown op {op!r}.")
+
+        sequences = request['sequences'] if op == 'score' else request['contexts']
+        automaton = await self.models.get(request['model'])
+        encoded = [automaton.encode(sequence) for sequence in sequences]
+
+        self.stats['requests'] += 1
+        future = asyncio.get_running_loop().create_future()
+
+        key = (request['model'], id(automaton))
+        if key not in self._pending:
+            self._pending[key] = (automaton, [])
+            asyncio.get_running_loop().call_soon(self._flush, key)
+        self._pending[key][1].append((op, encoded, future))
+
+        return await future
+
+    def _flush(self, key):
+        """Answer every request queued for a model with one call of the automaton."""
+        automaton, batch = self._pending.pop(key)
+        self.stats['batches'] += 1
+
+        try:
+            states, log_likelihoods = automaton.run_encoded(
+                [sequence for _, encoded, _ in batch for sequence in encoded])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        start = 0
+        for op, encoded, future in batch:
+            stop = start + len(encoded)
+            if not future.done():
+                if op == 'score':
+                    future.set_result(log_likelihoods[start:stop].tolist())
+                else:
+                    future.set_result(automaton.probs[states[start:stop]].tolist())
+            start = stop
+
+
+class Client:
+    """Client of a ModelServer. Requests may be sent concurrently over one connection.
+
+    Use `await Client.connect(host, port)` or `await Client.connect(path=...)`.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._waiting = {}
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=None, path=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, op, **fields):
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = future
+
+        self._writer.write(json.dumps({'id': self._next_id, 'op': op, **fields}).encode() + b'\n')
+        await self._writer.drain()
+
+        response = await future
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response['result']
+
+    async def score(self, model, sequences):
+        """Return the natural log-likelihood of each sequence under the model."""
+        return await self.request('score', model=model, sequences=sequences)
+
+    async def predict(self, model, contexts):
+        """Return the next symbol distribution after each context, indexed like the model alphabet."""
+        return await self.request('predict', model=model, contexts=contexts)
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._receiver.cancel()
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._waiting.pop(response['id'], None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("The connection to the server was closed."))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pypst.server', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model-dir', required=True, help='directory of pickled PST instances, named <model>.pkl')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', help='listen on this unix socket instead of host:port')
+    parser.add_argument('--max-memory', type=int, default=512 * 2**20, help='bytes of models kept in memory')
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = ModelServer(directory_loader(args.model_dir), max_memory=args.max_memory)
+        await server.start(host=args.host, port=args.port, path=args.socket)
+        print(f'Serving {args.model_dir} on {server.address}', flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+import math
+import numpy as np
+
+
+class SuffixAutomaton:
+    """A PST compiled into a state transition table for constant time next symbol predictions.
+
+    The states are the contexts that are a prefix of some node of the tree. For any history
+    the current state is the longest suffix of it that is a state, and the next state after
+    a symbol only depends on the current state and that symbol. Each state predicts with the
+    next symbol distribution of its longest suffix that is a (non internal) node of the tree,
+    the nodes pst_convert_to_pfa turns into states of the PFA.
+
+    Args:
+        tree (list): Tree array returned by pst_learn.
+        alphabet (list): The symbols, in the order used by the tree.
+    """
+
+    def __init__(self, tree, alphabet):
+        self.alphabet = list(alphabet)
+        self.symbol_index = {symbol: idx for idx, symbol in enumerate(self.alphabet)}
+
+        nodes = {}
+        tree_nodes = set()
+        for level in tree:
+            for string, internal, g_sigma_s in zip(level['string'], level['internal'], level['g_sigma_s']):
+                tree_nodes.add(tuple(string))
+                if not internal:
+                    nodes[tuple(string)] = np.asarray(g_sigma_s, dtype=float)
+
+        contexts = sorted(
+            {node[:end] for node in tree_nodes for end in range(len(node) + 1)},
+            key=lambda context: (len(context), context))
+        context_ids = {context: idx for idx, context in enumerate(contexts)}
+
+        self.contexts = contexts
+        self.next_state = np.zeros((len(contexts), len(self.alphabet)), dtype=np.intp)
+        self.probs = np.zeros((len(contexts), len(self.alphabet)))
+
+        for state, context in enumerate(contexts):
+            self.probs[state] = nodes[longest_suffix(context, nodes)]
+
+            for symbol_idx in range(len(self.alphabet)):
+                self.next_state[state, symbol_idx] = context_ids[
+                    longest_suffix(context + (symbol_idx,), context_ids)]
+
+        with np.errstate(divide='ignore'):
+            self.log_probs = np.log(self.probs)
+
+    @property
+    def nbytes(self):
+        return self.next_state.nbytes + self.probs.nbytes + self.log_probs.nbytes
+
+    def stream(self):
+        """Return a new StreamingPredictor starting from an empty history."""
+        return StreamingPredictor(self)
+
+    def encode(self, sequence):
+        try:
+            return [self.symbol_index[symbol] for symbol in sequence]
+        except KeyError as e:
+            raise ValueError(f"Symbol {e.args[0]!r} is not in the alphabet.") from None
+
+    def run(self, sequences):
+        """Feed every sequence through the automaton in lockstep.
+
+        Returns:
+            tuple: the final state and the log-likelihood of each sequence.
+        """
+        return self.run_encoded([self.encode(sequence) for sequence in sequences])
+
+    def run_encoded(self, encoded):
+        """Same as run, for sequences already encoded as alphabet indexes."""
+        lengths = np.array([len(sequence) for sequence in encoded], dtype=np.intp)
+
+        indexes = np.zeros((len(encoded), max(lengths, default=0)), dtype=np.intp)
+        for row, sequence in enumerate(encoded):
+            indexes[row, :len(sequence)] = sequence
+
+        states = np.zeros(len(encoded), dtype=np.intp)
+        log_likelihoods = np.zeros(len(encoded))
+
+        for position in range(indexes.shape[1]):
+            active = position < lengths
+            symbols = indexes[:, position]
+            log_likelihoods[active] += self.log_probs[states[active], symbols[active]]
+            states[active] = self.next_state[states[active], symbols[active]]
+
+        return states, log_likelihoods
+
+    def score(self, sequences):
+        """Return the natural log-likelihood of each sequence, as an array."""
+        _, log_likelihoods = self.run(sequences)
+        return log_likelihoods
+
+    def predict(self, contexts):
+        """Return the next symbol distribution after each context, as an array (contexts, alphabet)."""
+        states, _ = self.run(contexts)
+        return self.probs[states]
+
+
+class StreamingPredictor:
+    """Follow a single stream of symbols through a SuffixAutomaton, one symbol at a time.
+
+    Attributes:
+        log_likelihood (float): natural log-likelihood of the symbols seen so far.
+        num_symbols (int): number of symbols seen so far.
+    """
+
+    def __init__(self, automaton):
+        self.automaton = automaton
+        self.reset()
+
+    def reset(self):
+        """Forget the history."""
+        self.state = 0
+        self.log_likelihood = 0.0
+        self.num_symbols = 0
+
+    @property
+    def distribution(self):
+        """Next symbol distribution given the history, indexed like the alphabet."""
+        return self.automaton.probs[self.state]
+
+    def update(self, symbol):
+        """Consume the next symbol.
+
+        Returns:
+            dict: 'surprise' of the symbol (its negative natural log probability), the running
+            'log_likelihood' and the next symbol 'distribution'.
+        """
+        symbol_idx = self.automaton.symbol_index.get(symbol)
+        if symbol_idx is None:
+            raise ValueError(f"Symbol {symbol!r} is not in the alphabet.")
+
+        log_prob = self.automaton.log_probs[self.state, symbol_idx]
+        self.state = self.automaton.next_state[self.state, symbol_idx]
+        self.log_likelihood += log_prob
+        self.num_symbols += 1
+
+        return {
+            'surprise': -log_prob if log_prob > -math.inf else math.inf,
+            'log_likelihood': self.log_likelihood,
+            'distribution': self.automaton.probs[self.state]
+        }
+
+
+def longest_suffix(context, candidates):
+    """Return the longest suffix of context found in candidates (the empty tuple at worst)."""
+    for start in range(len(context) + 1):
+        if context[start:] in candidates:
+            return context[start:]
+    raise KeyError(f"No suffix of {context} found.")
@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE = os.path.join(REPO_ROOT, 'pypst', 'fixtures', 'output_symbols.json')
+
+# modules the command line interface must not import
+HEAVY_MODULES = ['matplotlib', 'scipy', 'pandas', 'asyncio', 'concurrent.futures']
+
+# microseconds spent importing pypst itself, NumPy excluded. Generous enough for source that
+# is compiled on import (PYTHONDONTWRITEBYTECODE) and slow machines
+IMPORT_BUDGET_US = 100_000
+
+
+def run_cli(*args):
+    result = subprocess.run(
+        [sys.executable, '-m', 'pypst', *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def test_fit_score_compare_export(tmp_path):
+    with open(FIXTURE, 'r') as fp:
+        dataset = json.load(fp)
+
+    pre_path = tmp_path / 'pre.json'
+    post_path = tmp_path / 'post.txt'
+    pre_path.write_text(json.dumps(dataset[:1000]))
+    post_path.write_text('\n'.join(' '.join(song) for song in dataset[1000:2000]))
+
+    run_cli('fit', str(pre_path), '-o', str(tmp_path / 'pre.pkl'), '-L', '2', '--p-min', '0.00073')
+    run_cli('fit', str(post_path), '-o', str(tmp_path / 'post.pkl'), '-L', '2', '--p-min', '0.00073')
+
+    scores = run_cli('score', str(tmp_path / 'pre.pkl'), str(post_path)).splitlines()
+    assert scores[0] == 'song\tlength\tlog_likelihood'
+    assert len(scores) == 1001
+    assert np.isfinite(float(scores[1].split('\t')[2]))
+
+    comparison = run_cli('compare', str(tmp_path / 'pre.pkl'), str(tmp_path / 'post.pkl'), str(post_path))
+    assert comparison.splitlines()[-1].startswith('# log-likelihood per symbol')
+
+    run_cli('export', str(tmp_path / 'pre.pkl'), '--format', 'json', '-o', str(tmp_path / 'tree.json'))
+    with open(tmp_path / 'tree.json', 'r') as fp:
+        tree = json.load(fp)
+    assert tree['nodes'][0]['label'] == 'epsilon'
+    assert all(np.isclose(sum(node['g_sigma_s']), 1) for node in tree['nodes'])
+
+    run_cli('export', str(tmp_path / 'pre.pkl'), '--format', 'cytoscape', '-o', str(tmp_path))
+    assert (tmp_path / 'cytoscape_output_tree.sif').exists()
+
+
+def test_fit_best_first_node_budget(tmp_path):
+    run_cli(
+        'fit', FIXTURE, '-o', str(tmp_path / 'model.pkl'), '-L', '3', '--p-min', '0.00073',
+        '--learn-mode', 'best_first', '--max-nodes', '20', '--prune-counts')
+    run_cli('export', str(tmp_path / 'model.pkl'), '--format', 'json', '-o', str(tmp_path / 'tree.json'))
+
+    with open(tmp_path / 'tree.json', 'r') as fp:
+        tree = json.load(fp)
+    assert 1 < len(tree['nodes']) <= 20
+
+
+def test_import_time():
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import pypst.__main__'],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+
+    self_times = {}
+    for line in result.stderr.splitlines()[1:]:
+        self_time, _, module = line.split('|')
+        self_times[module.strip()] = int(self_time.split(':')[1])
+
+    for heavy_module in HEAVY_MODULES:
+        assert heavy_module not in self_times, f"{heavy_module} is imported"
+
+    pypst_time = sum(self_time for module, self_time in self_times.items() if module.startswith('pypst'))
+    assert pypst_time < IMPORT_BUDGET_US, f"importing pypst took {pypst_time} us"
@@ -1,5 +1,6 @@
 import json
 import numpy as np
+import pytest
 from transition_mat import (
     build_transition_matrix,
     build_alphabet_from_dataset,
@@ -7,6 +8,8 @@ from transition_mat import (
 from pst_learn import (
     pst_learn
 )
+from pst_to_pfa import pst_convert_to_pfa
+from pst_export import pst_export_to_cytoscape
 
 
 def test_compare_example_pst():
@@ -72,3 +75,147 @@ def test_compare_example_pst():
     assert generated_tree[2]['parent'] == [
         (3, 1), (10, 1), (10, 1), (10, 1), (17, 1), (17, 1), (17, 1), (22, 1), (23, 1)
     ]
+
+
+def test_level_mode_matches_sequential():
+
+    with open('fixtures/output_symbols.json', 'r') as fp:
+        dataset = json.load(fp)
+
+    alphabet = [a for a in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcd']
+
+    for L in [2, 3]:
+        transition_matrix = build_transition_matrix(dataset, L, alphabet=alphabet)
+
+        trees = [
+            pst_learn(
+                transition_matrix['occurrence_mats'],
+                alphabet,
+                transition_matrix['N'],
+                L=L, p_min=0.00073, g_min=.01, r=1.6, alpha=17.5, mode=mode)
+            for mode in ['sequential', 'level']
+        ]
+
+        for sequential_level, batched_level in zip(*trees):
+            for key in ['string', 'parent', 'label', 'internal']:
+                assert sequential_level[key] == batched_level[key], f"L={L}: '{key}' differs between modes"
+
+            for expected, actual in zip(sequential_level['g_sigma_s'], batched_level['g_sigma_s']):
+                assert np.array_equal(expected, actual)
+
+
+def test_sequential_mode_has_no_duplicate_contexts():
+
+    with open('fixtures/output_symbols.json', 'r') as fp:
+        dataset = json.load(fp)
+
+    alphabet = [a for a in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcd']
+    transition_matrix = build_transition_matrix(dataset, 3, alphabet=alphabet)
+
+    tree = pst_learn(
+        transition_matrix['occurrence_mats'],
+        alphabet,
+        transition_matrix['N'],
+        L=3, p_min=0.00073, g_min=.01, r=1.6, alpha=17.5)
+
+    for level in tree:
+        strings = [tuple(string) for string in level['string']]
+        assert len(strings) == len(set(strings))
+
+
+def test_parallel_learning_matches_sequential():
+
+    with open('fixtures/output_symbols.json', 'r') as fp:
+        dataset = json.load(fp)
+
+    alphabet = [a for a in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcd']
+    transition_matrix = build_transition_matrix(dataset, 3, alphabet=alphabet)
+
+    trees = [
+        pst_learn(
+            transition_matrix['occurrence_mats'],
+            alphabet,
+            transition_matrix['N'],
+            L=3, p_min=0.00073, g_min=.01, r=1.6, alpha=17.5, n_jobs=n_jobs)
+        for n_jobs in [1, 2]
+    ]
+
+    for sequential_level, parallel_level in zip(*trees):
+        for key in ['string', 'parent', 'label', 'internal']:
+            assert sequential_level[key] == parallel_level[key], f"'{key}' differs with n_jobs=2"
+
+
+def test_invalid_n_jobs_is_rejected():
+
+    with open('fixtures/output_symbols.json', 'r') as fp:
+        dataset = json.load(fp)
+
+    transition_matrix = build_transition_matrix(dataset, 1)
+
+    for n_jobs in [0, -2]:
+        with pytest.raises(ValueError, match='n_jobs'):
+            pst_learn(
+                transition_matrix['occurrence_mats'],
+                transition_matrix['alphabet'],
+                transition_matrix['N'],
+                L=1, n_jobs=n_jobs)
+
+
+def test_best_first_respects_node_budget(tmp_path):
+
+    with open('fixtures/output_symbols.json', 'r') as fp:
+        dataset = json.load(fp)
+
+    alphabet = [a for a in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcd']
+    transition_matrix = build_transition_matrix(dataset, 4, alphabet=alphabet)
+
+    def learn(**kwargs):
+        return pst_learn(
+            transition_matrix['occurrence_mats'],
+            alphabet,
+            transition_matrix['N'],
+            L=4, p_min=0.00073, g_min=.01, r=1.6, alpha=17.5, **kwargs)
+
+    # without a budget best first finds the same nodes, only in a different order
+    full_tree = learn(mode='level')
+    unbounded_tree = learn(mode='best_first')
+    for full_level, unbounded_level in zip(full_tree, unbounded_tree):
+        assert sorted(zip(map(tuple, full_level['string']), full_level['internal'])) == \
+            sorted(zip(map(tuple, unbounded_level['string']), unbounded_level['internal']))
+
+    for max_nodes in [1, 10, 60]:
+        tree = learn(mode='best_first', max_nodes=max_nodes)
+        assert sum(len(level['string']) for level in tree) <= max_nodes
+
+    pfa = pst_convert_to_pfa(tree, alphabet)
+    assert len(pfa) > 0
+
+    pst_export_to_cytoscape(tree, alphabet, output_dir=str(tmp_path))
+    assert (tmp_path / 'cytoscape_output_tree.sif').exists()
+
+
+def test_pruned_counts_learn_the_same_tree():
+
+    with open('fixtures/output_symbols.json', 'r') as fp:
+        dataset = json.load(fp)
+
+    alphabet = [a for a in 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcd']
+    L = 4
+    p_min = 0.00073
+
+    trees = []
+    for counts_p_min, n_jobs in [(None, 1), (p_min, 1), (p_min, 2)]:
+        transition_matrix = build_transition_matrix(dataset, L, alphabet=alphabet, p_min=counts_p_min)
+        trees.append(pst_learn(
+            transition_matrix['occurrence_mats'],
+            alphabet,
+            transition_matrix['N'],
+            L=L, p_min=p_min, g_min=.01, r=1.6, alpha=17.5, n_jobs=n_jobs))
+
+    for expected_level, *pruned_levels in zip(*trees):
+        for pruned_level in pruned_levels:
+            for key in ['string', 'parent', 'label', 'internal']:
+                assert expected_level[key] == pruned_level[key]
+
+            for expected, actual in zip(expected_level['g_sigma_s'], pruned_level['g_sigma_s']):
+                assert np.array_equal(expected, actual)
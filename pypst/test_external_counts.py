@@ -0,0 +1,41 @@
+import numpy as np
+from transition_mat import build_transition_matrix
+from external_counts import build_transition_matrix_out_of_core
+
+
+def assert_same_counts(dense, out_of_core, order):
+    assert np.array_equal(dense['N'], out_of_core['N'])
+    assert np.array_equal(dense['p_starting_symbol'], out_of_core['p_starting_symbol'])
+    assert np.array_equal(dense['occurrence_mats'][0], out_of_core['occurrence_mats'][0])
+
+    for cur_order in range(1, order + 1):
+        dense_mat = dense['occurrence_mats'][cur_order]
+        sparse_mat = out_of_core['occurrence_mats'][cur_order]
+
+        # every context that starts or ends an observed n-gram is kept
+        prefixes = set(map(tuple, np.argwhere(dense_mat.any(axis=-1)).tolist()))
+        suffixes = set(map(tuple, np.argwhere(dense_mat.any(axis=0)).tolist()))
+        assert set(map(tuple, sparse_mat.contexts.tolist())) == prefixes | suffixes
+
+        for context in prefixes | suffixes:
+            assert np.array_equal(dense_mat[context], sparse_mat[context])
+            assert np.array_equal(dense_mat[(slice(None),) + context], sparse_mat[(slice(None),) + context])
+
+
+def test_out_of_core_counts_match_in_memory_counts():
+    dataset = ['AAABCABC', 'CABCAB', '', 'BCABCA', 'CBACBA', 'ABCABCDDDA', 'D']
+    alphabet = ['A', 'B', 'C', 'D']
+    order = 3
+
+    dense = build_transition_matrix([list(song) for song in dataset], order, alphabet=alphabet)
+
+    # a chunk of 4 items splits most songs, the tiny memory cap spills a run for every chunk
+    for chunk_size, max_memory in [(1000, 2**20), (4, 2**20), (4, 1), (1, 1)]:
+        out_of_core = build_transition_matrix_out_of_core(
+            (iter(song) for song in dataset),
+            order,
+            alphabet,
+            chunk_size=chunk_size,
+            max_memory=max_memory)
+
+        assert_same_counts(dense, out_of_core, order)
@@ -0,0 +1,45 @@
+from transition_mat import build_transition_matrix
+from pst_learn import pst_learn
+from fit_stats import FitStats
+from wrapper import PST
+
+
+def test_pst_learn_records_stages_and_counters(dataset, fixture_alphabet):
+    transition_matrix = build_transition_matrix(dataset, 2, alphabet=fixture_alphabet)
+
+    stats = FitStats()
+    tree = pst_learn(
+        transition_matrix['occurrence_mats'],
+        fixture_alphabet,
+        transition_matrix['N'],
+        L=2, p_min=0.0073, g_min=.01, r=1.6, alpha=17.5,
+        stats=stats)
+
+    assert set(stats.stages) == {'expand', 'fix_path', 'g_sigma'}
+    for record in stats.stages.values():
+        assert record['wall_time'] >= 0
+        assert 'memory_peak' in record
+
+    counters = stats.counters
+    assert counters['accepted_per_depth'] == [1, 26, 9]
+    assert counters['internal_per_depth'] == [sum(level['internal']) for level in tree]
+    assert counters['candidates_evaluated'] >= sum(counters['accepted_per_depth'][1:])
+    assert counters['queue_peak'] > 0
+    assert counters['fix_path_iterations'] >= 1
+
+
+def test_pst_fit_stats_callback(dataset):
+    seen = []
+
+    pst = PST(L=2, stats_callback=lambda stage, record: seen.append(stage))
+    pst.fit(dataset)
+
+    assert seen == ['count', 'expand', 'fix_path', 'g_sigma']
+    assert set(pst.fit_stats_['stages']) == set(seen)
+    assert pst.fit_stats_['counters']['fix_path_iterations'] >= 1
+
+
+def test_pst_fit_stats_disabled_by_default():
+    pst = PST(L=1)
+    pst.fit([['A', 'B', 'A', 'B']])
+    assert pst.fit_stats_ is None
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from wrapper import PST
+
+
+def assert_same_tree(expected, actual):
+    assert len(expected) == len(actual)
+    for expected_level, actual_level in zip(expected, actual):
+        for key in ['string', 'parent', 'label', 'internal']:
+            assert expected_level[key] == actual_level[key], f"'{key}' differs"
+
+        for key in ['g_sigma_s', 'p', 'f']:
+            for expected_value, actual_value in zip(expected_level[key], actual_level[key]):
+                assert np.array_equal(expected_value, actual_value), f"'{key}' differs"
+
+
+def test_update_matches_refit(dataset, fixture_alphabet):
+    parameters = dict(L=3, p_min=0.00073, alphabet=fixture_alphabet)
+
+    batches = [dataset[:1000], dataset[1000:3000], dataset[3000:3600], dataset[3600:3601], []]
+
+    pst = PST(incremental=True, track_stats=True, **parameters)
+    pst.fit(batches[0])
+
+    patched = []
+    for batch_end, batch in enumerate(batches[1:], start=2):
+        pst.update(batch)
+        patched.append(pst.fit_stats_['counters']['tree_patched'])
+
+        expected = PST(**parameters)
+        expected.fit([song for batch in batches[:batch_end] for song in batch])
+        assert_same_tree(expected.tree, pst.tree)
+
+    # the large batches change the tree, adding nothing leaves the nodes in place
+    assert patched[0] is False
+    assert patched[-1] is True
+    assert len(pst.pfa) == len(expected.pfa)
+
+
+def test_update_requires_incremental():
+    pst = PST(L=1)
+    pst.fit([['A', 'B', 'A', 'B']])
+
+    with pytest.raises(ValueError, match='incremental=True'):
+        pst.update([['A', 'B']])
+
+
+def test_update_rejects_unknown_symbols():
+    pst = PST(L=1, incremental=True)
+    pst.fit([['A', 'B', 'A', 'B']])
+
+    with pytest.raises(ValueError, match='not in the alphabet'):
+        pst.update([['A', 'C']])
+
+    with pytest.raises(ValueError, match='not in the alphabet'):
+        pst.update([[('A', 2), ('C', 1)]], run_length_encoded=True)
+
+    pst = PST(L=1, incremental=True, alphabet=['A', 'B', 'C'])
+    pst.fit([['A', 'B', 'A', 'B']])
+    pst.update([['A', 'C']])
+
+
+def test_update_counts_past_uint16():
+    pst = PST(L=1, incremental=True)
+    song = ['A', 'B'] * 20000
+    pst.fit([song])
+    for _ in range(3):
+        pst.update([song])
+
+    counts = pst._counts
+    assert counts['occurrence_mats'][0].tolist() == [80000, 80000]
+    assert counts['N'][0] == 160000
+
+    for p in pst.tree[1]['p']:
+        assert np.isclose(np.sum(p), 0.5, atol=1e-3)
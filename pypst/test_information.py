@@ -0,0 +1,62 @@
+from collections import Counter
+import numpy as np
+import pytest
+from scipy.stats import entropy
+from transition_mat import build_transition_matrix
+from information import information_from_counts, information_profiles
+
+
+def test_information_matches_loops(dataset):
+    counts = build_transition_matrix(dataset, 3)
+    alphabet = counts['alphabet']
+    results = information_from_counts(counts['occurrence_mats'], base=2)
+
+    for k, mat in enumerate(counts['occurrence_mats']):
+        rows = mat.reshape(-1, len(alphabet))
+        totals = rows.sum(axis=1)
+
+        context_entropy = np.array([entropy(row, base=2) if row.sum() else np.nan for row in rows])
+        assert np.allclose(results['context_entropy'][k].ravel(), context_entropy, equal_nan=True)
+        assert np.isclose(
+            results['conditional_entropy'][k],
+            np.nansum(totals / totals.sum() * context_entropy))
+        assert np.isclose(results['block_entropy'][k], entropy(mat.ravel(), base=2))
+
+        # mutual information of the symbols k steps apart, counted directly from the songs
+        pairs = Counter((song[t - k], song[t]) for song in dataset for t in range(k, len(song)))
+        joint = np.zeros((len(alphabet), len(alphabet)))
+        for (first, last), count in pairs.items():
+            joint[alphabet.index(first), alphabet.index(last)] = count
+        joint /= joint.sum()
+        px, py = joint.sum(axis=1), joint.sum(axis=0)
+        nonzero = joint > 0
+        expected = np.sum(joint[nonzero] * np.log2(joint[nonzero] / np.outer(px, py)[nonzero]))
+        assert np.isclose(results['mutual_information'][k], expected)
+
+    assert np.isclose(results['mutual_information'][0], results['block_entropy'][0])
+    assert np.all(np.diff(results['conditional_entropy']) <= 1e-12)
+
+
+def test_profiles_share_alphabet(dataset):
+    datasets = {'pre': dataset[:1800], 'post': dataset[1800:]}
+
+    profiles = information_profiles(datasets, 2, n_jobs=2)
+    serial = information_profiles(datasets, 2, n_jobs=1)
+
+    assert profiles['pre']['alphabet'] == profiles['post']['alphabet']
+    for name in datasets:
+        assert np.allclose(profiles[name]['conditional_entropy'], serial[name]['conditional_entropy'])
+        assert profiles[name]['context_entropy'][2].shape == (len(profiles[name]['alphabet']),) * 2
+
+
+def test_sparse_counts_are_rejected(dataset):
+    counts = build_transition_matrix(dataset, 2, p_min=0.0073)
+
+    with pytest.raises(ValueError):
+        information_from_counts(counts['occurrence_mats'])
+
+
+def test_invalid_n_jobs_is_rejected(dataset):
+    for n_jobs in [0, -2]:
+        with pytest.raises(ValueError, match='n_jobs'):
+            information_profiles({'pre': dataset[:10], 'post': dataset[10:20]}, 1, n_jobs=n_jobs)
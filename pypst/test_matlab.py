@@ -0,0 +1,123 @@
+import os
+import numpy as np
+import scipy.io
+from transition_mat import build_transition_matrix
+from matlab import (
+    load_songs_mat,
+    save_songs_mat,
+    load_counts_mat,
+    save_counts_mat,
+    load_tree_mat,
+    save_tree_mat
+)
+from streaming import SuffixAutomaton
+from wrapper import PST
+
+SONGS_MAT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'Modeling_phys_canary', 'USA5288_post_lesion_songs.mat')
+
+
+def test_load_padded_songs():
+    songs = load_songs_mat(SONGS_MAT)
+
+    assert len(songs) == 3626
+    assert songs[0] == ['b', 'Y']
+    assert all(song and ' ' not in song for song in songs)
+
+
+def test_songs_round_trip(dataset, tmp_path):
+    songs = [list(song) for song in dataset[:200]] + [[]]
+    save_songs_mat(tmp_path / 'songs.mat', songs, variable_name='mapped_syllable_order')
+    assert load_songs_mat(tmp_path / 'songs.mat') == songs
+
+    songs = [['ab', 'c'], ['c'], ['d', 'ab', 'ab']]
+    save_songs_mat(tmp_path / 'songs.mat', songs)
+    assert load_songs_mat(tmp_path / 'songs.mat', variable_names=['songs']) == songs
+
+
+def test_counts_round_trip(dataset, tmp_path):
+    counts = build_transition_matrix(dataset, 3)
+
+    save_counts_mat(tmp_path / 'counts.mat', counts)
+    loaded = load_counts_mat(tmp_path / 'counts.mat')
+
+    assert loaded['alphabet'] == counts['alphabet']
+    assert np.array_equal(loaded['N'], counts['N'])
+    assert np.array_equal(loaded['p_starting_symbol'], counts['p_starting_symbol'])
+    for expected, actual in zip(counts['occurrence_mats'], loaded['occurrence_mats']):
+        assert expected.dtype == actual.dtype
+        assert np.array_equal(expected, actual)
+
+    # sparse counts are written dense, holding only the counted contexts
+    save_counts_mat(tmp_path / 'pruned.mat', build_transition_matrix(dataset, 3, p_min=0.00073))
+    pruned = load_counts_mat(tmp_path / 'pruned.mat')['occurrence_mats'][2]
+    assert pruned.shape == counts['occurrence_mats'][2].shape
+    assert pruned.any()
+    assert np.array_equal(pruned[pruned > 0], counts['occurrence_mats'][2][pruned > 0])
+
+
+def test_tree_round_trip(dataset, tmp_path):
+    pst = PST(L=3, p_min=0.00073)
+    pst.fit(dataset)
+
+    save_tree_mat(tmp_path / 'tree.mat', pst.tree, pst.alphabet)
+    tree, alphabet = load_tree_mat(tmp_path / 'tree.mat')
+
+    assert alphabet == pst.alphabet
+    assert len(tree) == len(pst.tree)
+    for expected_level, actual_level in zip(pst.tree, tree):
+        for key in ['string', 'parent', 'label', 'internal']:
+            assert expected_level[key] == actual_level[key], f"'{key}' differs"
+
+        assert np.array_equal(expected_level['g_sigma_s'], actual_level['g_sigma_s'])
+
+        # the .mat file holds the probability and count of each context
+        for key in ['p', 'f']:
+            assert np.allclose([np.sum(value) for value in expected_level[key]], actual_level[key])
+
+    assert np.array_equal(SuffixAutomaton(tree, alphabet).probs, pst.automaton.probs)
+
+    # nodes are the columns of one matrix per field, as pst_learn writes them
+    tree_mat = scipy.io.loadmat(tmp_path / 'tree.mat')['TREE']
+    num_nodes = len(pst.tree[2]['string'])
+    assert tree_mat['string'][0, 2].shape == (2, num_nodes)
+    assert tree_mat['parent'][0, 2].shape == (2, num_nodes)
+    assert tree_mat['g_sigma_s'][0, 2].shape == (len(pst.alphabet), num_nodes)
+    assert tree_mat['internal'][0, 2].shape == (1, num_nodes)
+    assert tree_mat['f'][0, 2].shape == (1, num_nodes)
+
+
+def test_load_matlab_tree(tmp_path):
+    """A TREE laid out like the one pst_learn builds in MATLAB, over the alphabet 'AB'."""
+    fields = ['string', 'parent', 'label', 'internal', 'g_sigma_s', 'p', 'f']
+    tree_mat = np.empty((1, 3), dtype=[(field, object) for field in fields])
+
+    def cell(*values):
+        cells = np.empty((1, len(values)), dtype=object)
+        cells[0, :] = values
+        return cells
+
+    levels = [
+        (np.zeros((0, 1)), [[0], [0]], cell('epsilon'), [[0]], [[0.6], [0.4]], [[1]], [[10]]),
+        ([[1, 2]], [[1, 1], [1, 1]], cell('A', 'B'), [[1, 0]], [[0.5, 0.8], [0.5, 0.2]], [[0.6, 0.4]], [[6, 4]]),
+        ([[2], [1]], [[1], [2]], cell('BA'), [[0]], [[0.9], [0.1]], [[0.2]], [[2]]),
+    ]
+    for depth, level in enumerate(levels):
+        for field, value in zip(fields, level):
+            tree_mat[field][0, depth] = value if field == 'label' else np.array(value, dtype=float)
+
+    scipy.io.savemat(tmp_path / 'tree.mat', {'TREE': tree_mat, 'ALPHABET': 'AB'})
+    tree, alphabet = load_tree_mat(tmp_path / 'tree.mat')
+
+    assert alphabet == ['A', 'B']
+    assert [level['string'] for level in tree] == [[[]], [[0], [1]], [[1, 0]]]
+    assert [level['parent'] for level in tree] == [[(0, 0)], [(0, 0), (0, 0)], [(0, 1)]]
+    assert [level['label'] for level in tree] == [['epsilon'], [['A'], ['B']], [['B', 'A']]]
+    assert tree[1]['internal'] == [1, 0]
+    assert np.allclose(tree[1]['g_sigma_s'], [[0.5, 0.5], [0.8, 0.2]])
+    assert tree[2]['p'] == [0.2] and tree[2]['f'] == [2]
+
+    # the automaton predicts with the longest non internal suffix, 'BA' after ...BA and the root after ...A
+    automaton = SuffixAutomaton(tree, alphabet)
+    assert np.allclose(automaton.predict([['B', 'A'], ['A', 'A'], ['B']]), [[0.9, 0.1], [0.6, 0.4], [0.8, 0.2]])
@@ -0,0 +1,66 @@
+import asyncio
+import pickle
+import numpy as np
+import pytest
+from wrapper import PST
+from server import Client, ModelServer, directory_loader
+
+
+def test_server_batches_requests(dataset, fixture_alphabet, tmp_path):
+
+    models = {}
+    for name, songs in [('pre', dataset[:1000]), ('post', dataset[1000:2000])]:
+        models[name] = PST(L=2, p_min=0.00073, alphabet=fixture_alphabet)
+        models[name].fit(songs)
+        with open(tmp_path / f'{name}.pkl', 'wb') as fp:
+            pickle.dump(models[name], fp)
+
+    songs = dataset[2000:2040]
+
+    async def run():
+        server = await ModelServer(directory_loader(tmp_path)).start(port=0)
+        client = await Client.connect(*server.address[:2])
+
+        scores = await asyncio.gather(*[client.score('pre', [song]) for song in songs])
+        predictions = await client.predict('post', [song[:3] for song in songs])
+
+        with pytest.raises(RuntimeError, match='FileNotFoundError'):
+            await client.score('missing', [songs[0]])
+        with pytest.raises(RuntimeError, match='not in the alphabet'):
+            await client.score('pre', [['?']])
+
+        await client.close()
+        await server.close()
+        return server, scores, predictions
+
+    server, scores, predictions = asyncio.run(run())
+
+    assert np.allclose([score for [score] in scores], models['pre'].automaton.score(songs))
+    assert np.allclose(predictions, models['post'].automaton.predict([song[:3] for song in songs]))
+
+    assert server.models.stats['loads'] == 2
+    assert server.stats['requests'] == len(songs) + 1
+    assert server.stats['batches'] < server.stats['requests']
+
+
+def test_cache_evicts_least_recently_used(dataset, fixture_alphabet):
+    pst = PST(L=2, p_min=0.00073, alphabet=fixture_alphabet)
+    pst.fit(dataset[:500])
+
+    loaded = []
+
+    def loader(name):
+        loaded.append(name)
+        return pst
+
+    async def run():
+        server = ModelServer(loader, max_memory=2 * pst.automaton.nbytes)
+        for name in ['a', 'b', 'a', 'c', 'a', 'b']:
+            await server.handle({'op': 'score', 'model': name, 'sequences': [dataset[0]]})
+        return server
+
+    server = asyncio.run(run())
+
+    assert loaded == ['a', 'b', 'c', 'b']
+    assert server.models.stats['evictions'] == 2
+    assert server.models.nbytes <= 2 * pst.automaton.nbytes
@@ -0,0 +1,63 @@
+import math
+import numpy as np
+from wrapper import PST
+
+
+def scan_tree(tree, history):
+    """Find the next symbol distribution by scanning the tree for the longest suffix of history."""
+    for depth in range(min(len(history), len(tree) - 1), -1, -1):
+        suffix = list(history[len(history) - depth:])
+        level = tree[depth]
+        for string, internal, g_sigma_s in zip(level['string'], level['internal'], level['g_sigma_s']):
+            if string == suffix and not internal:
+                return g_sigma_s
+
+
+def test_predictor_matches_tree_scan(dataset, fixture_alphabet):
+
+    pst = PST(L=3, p_min=0.00073, alphabet=fixture_alphabet)
+    pst.fit(dataset[:2000])
+    symbol_index = {symbol: idx for idx, symbol in enumerate(fixture_alphabet)}
+
+    songs = dataset[2000:2050]
+    for song in songs:
+        predictor = pst.predictor()
+        history = []
+        log_likelihood = 0.0
+
+        assert np.allclose(predictor.distribution, scan_tree(pst.tree, history))
+        for symbol in song:
+            p = scan_tree(pst.tree, history)[symbol_index[symbol]]
+            step = predictor.update(symbol)
+            history.append(symbol_index[symbol])
+            log_likelihood += math.log(p) if p > 0 else -math.inf
+
+            if p > 0:
+                assert math.isclose(step['surprise'], -math.log(p))
+            else:
+                assert step['surprise'] == math.inf
+            assert np.allclose(step['distribution'], scan_tree(pst.tree, history))
+
+        assert math.isclose(predictor.log_likelihood, log_likelihood)
+
+    scores = pst.automaton.score(songs)
+    for song, score in zip(songs, scores):
+        predictor = pst.predictor()
+        for symbol in song:
+            predictor.update(symbol)
+        assert math.isclose(score, predictor.log_likelihood)
+
+    predictions = pst.automaton.predict([song[:5] for song in songs])
+    for song, prediction in zip(songs, predictions):
+        assert np.allclose(prediction, scan_tree(pst.tree, [symbol_index[s] for s in song[:5]]))
+
+
+def test_update_rebuilds_automaton(dataset, fixture_alphabet):
+
+    pst = PST(L=2, p_min=0.00073, alphabet=fixture_alphabet, incremental=True)
+    pst.fit(dataset[:500])
+    before = pst.automaton
+    pst.update(dataset[500:1000])
+
+    assert pst.automaton is not before
+    assert np.allclose(pst.automaton.predict([[]])[0], pst.tree[0]['g_sigma_s'][0])
@@ -1,6 +1,11 @@
 import numpy as np
 import pytest
-from transition_mat import build_transition_matrix
+from transition_mat import (
+    build_transition_matrix,
+    build_transition_matrix_from_runs,
+    encode_runs,
+    decode_runs,
+)
 
 """
 def test_build_transition_matrix_empty_dataset():
@@ -79,3 +84,67 @@ def test_build_trans_mat_2():
          [2, 0, 0],
          [0, 0, 0]]
     ]))
+
+
+def test_pruned_transition_matrix_matches_dense_counts():
+    dataset = [
+        [ch for ch in e]
+        for e in ['AAABCABC', 'CABCAB', 'BCABCA', 'CBACBA', 'ABCABC', 'DDAB', '']
+    ]
+    order = 3
+    p_min = 0.1
+
+    dense = build_transition_matrix(dataset, order)
+    pruned = build_transition_matrix(dataset, order, p_min=p_min)
+
+    assert np.array_equal(dense['N'], pruned['N'])
+    assert np.array_equal(dense['p_starting_symbol'], pruned['p_starting_symbol'])
+    assert np.array_equal(dense['occurrence_mats'][0], pruned['occurrence_mats'][0])
+
+    # 'D' occurs with probability 2/36 and is never a candidate
+    assert [tuple(c) for c in pruned['occurrence_mats'][1].contexts] == [(0,), (1,), (2,)]
+
+    for cur_order in range(1, order + 1):
+        dense_mat = dense['occurrence_mats'][cur_order]
+        pruned_mat = pruned['occurrence_mats'][cur_order]
+        assert pruned_mat.shape == dense_mat.shape
+
+        for context in pruned_mat.contexts:
+            assert np.array_equal(pruned_mat[tuple(context)], dense_mat[tuple(context)])
+            assert np.array_equal(
+                pruned_mat[(slice(None),) + tuple(context)],
+                dense_mat[(slice(None),) + tuple(context)])
+
+        # gathering several contexts at once behaves like numpy indexing
+        contexts = tuple(pruned_mat.contexts.T)
+        assert np.array_equal(pruned_mat[contexts], dense_mat[contexts])
+        assert np.array_equal(
+            pruned_mat[(slice(None),) + contexts],
+            dense_mat[(slice(None),) + contexts])
+
+
+def test_build_transition_matrix_from_runs_matches_expanded():
+    dataset = [
+        [ch for ch in e]
+        for e in ['AAAAAABBBBCAAAAAAAA', 'CCCCCCCCCCCC', 'ABCABC', 'BBBBBBBBAAAC', 'D', '']
+    ]
+    order = 3
+
+    runs = [encode_runs(sequence) for sequence in dataset]
+    assert runs[0] == [('A', 6), ('B', 4), ('C', 1), ('A', 8)]
+    assert [decode_runs(sequence) for sequence in runs] == dataset
+
+    expected = build_transition_matrix(dataset, order)
+    result = build_transition_matrix_from_runs(runs, order)
+
+    assert result['alphabet'] == expected['alphabet']
+    assert np.array_equal(result['N'], expected['N'])
+    assert np.array_equal(result['p_starting_symbol'], expected['p_starting_symbol'])
+    for expected_mat, result_mat in zip(expected['occurrence_mats'], result['occurrence_mats']):
+        assert np.array_equal(expected_mat, result_mat)
+
+    # runs of the same item next to each other count like a single run
+    split_runs = [[('A', 2), ('A', 4), ('B', 4), ('C', 1), ('A', 8)]]
+    assert np.array_equal(
+        build_transition_matrix_from_runs(split_runs, order)['occurrence_mats'][3],
+        build_transition_matrix(dataset[:1], order)['occurrence_mats'][3])
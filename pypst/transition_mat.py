@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import numpy as np
 
 def convert_sequence_to_indexes(alphabet, sequence):
@@ -37,7 +37,8 @@ def build_alphabet_from_dataset(dataset : List[List[str]]) -> List[str]:
 def build_transition_matrix(
     dataset : List[List[str]],
     order : int,
-    alphabet : List[str] = None
+    alphabet : List[str] = None,
+    p_min : float = None
 ):
     """Build a set of transition matrices for a given dataset and order.
 
@@ -46,6 +47,8 @@ def build_transition_matrix(
         order (int) - the order of the PST to build
         alphabet (List[str]) - an optional list of items. The position in the list is the index in the alphabet
             if not provided, the alphabet will be built from the dataset
+        p_min (float) - optional minimum occurrence probability used by pst_learn. When given, only the
+            contexts pst_learn can visit with this p_min are counted, see build_pruned_transition_matrix
 
     Outputs:
         N [alphabet size, 1] - vector of total entries for each order
@@ -55,6 +58,9 @@ def build_transition_matrix(
     if alphabet is None:
         alphabet = build_alphabet_from_dataset(dataset)
 
+    if p_min is not None:
+        return build_pruned_transition_matrix(dataset, order, alphabet, p_min)
+
     alphabet_length = len(alphabet)
 
     occurrence_mats = [
@@ -101,3 +107,273 @@ def build_transition_matrix(
         "alphabet": alphabet,
         "N": n
     }
+
+
+def encode_runs(sequence : List[str]) -> List[Tuple[str, int]]:
+    """Run length encode a sequence as a list of (item, number of consecutive repeats)."""
+    runs = []
+    for item in sequence:
+        if runs and runs[-1][0] == item:
+            runs[-1] = (item, runs[-1][1] + 1)
+        else:
+            runs.append((item, 1))
+    return runs
+
+
+def decode_runs(runs : List[Tuple[str, int]]) -> List[str]:
+    """Expand a run length encoded sequence back into a list of items."""
+    sequence = []
+    for item, length in runs:
+        sequence.extend([item] * length)
+    return sequence
+
+
+def build_transition_matrix_from_runs(
+    dataset : List[List[Tuple[str, int]]],
+    order : int,
+    alphabet : List[str] = None
+):
+    """Build the transition matrices of build_transition_matrix from run length encoded sequences.
+
+    A run of m identical items holds m - k windows of order k that only contain that item, these
+    are added in one step. Only the windows that cross into a following run are walked item by item,
+    at most order of them per run and order, so the cost grows with the number of runs rather than
+    the number of items.
+
+    Inputs:
+        dataset (List[List[Tuple[str, int]]]) - a list of sequences of (item, run length), see encode_runs
+        order (int) - the order of the PST to build
+        alphabet (List[str]) - an optional list of items, built from the dataset if not provided
+
+    Outputs:
+        the same as build_transition_matrix on the decoded sequences
+    """
+    if alphabet is None:
+        alphabet = build_alphabet_from_dataset([[item for item, _ in runs] for runs in dataset])
+
+    alphabet_length = len(alphabet)
+    alphabet_index = {item: idx for idx, item in enumerate(alphabet)}
+
+    occurrence_mats = [
+        np.zeros((alphabet_length,) * (i+1), dtype=np.uint16)
+        for i in range(order + 1)
+    ]
+
+    p_starting_symbol = np.zeros(alphabet_length, dtype=np.uint16)
+    n = np.zeros(order + 1, dtype=np.uint32)
+
+    for cur_runs in dataset:
+        runs = [(alphabet_index[item], length) for item, length in cur_runs if length > 0]
+        if not runs:
+            continue
+
+        p_starting_symbol[runs[0][0]] += 1
+
+        for run_index, (symbol, length) in enumerate(runs):
+            # windows that stay inside the run
+            for cur_order in range(min(length, order + 1)):
+                occurrence_mats[cur_order][(symbol,) * (cur_order + 1)] += length - cur_order
+                n[cur_order] += length - cur_order
+
+            # the first items after the run, enough for the longest window starting in it
+            following = []
+            next_index = run_index + 1
+            while len(following) < order and next_index < len(runs):
+                next_symbol, next_length = runs[next_index]
+                following.extend([next_symbol] * min(next_length, order - len(following)))
+                next_index += 1
+
+            # windows starting `remaining` items before the end of the run and leaving it
+            for remaining in range(1, min(length, order) + 1):
+                window = [symbol] * remaining + following
+                for cur_order in range(remaining, min(len(window), order + 1)):
+                    occurrence_mats[cur_order][tuple(window[:cur_order + 1])] += 1
+                    n[cur_order] += 1
+
+    return {
+        "occurrence_mats": occurrence_mats,
+        "p_starting_symbol": p_starting_symbol,
+        "alphabet": alphabet,
+        "N": n
+    }
+
+
+def build_pruned_transition_matrix(
+    dataset : List[List[str]],
+    order : int,
+    alphabet : List[str],
+    p_min : float
+):
+    """Build the transition matrices pst_learn reads for a given p_min, one order at a time.
+
+    pst_learn only visits a context of length k if its suffix of length k-1 was visited and the
+    context occurs with probability >= p_min. Counting proceeds like the apriori algorithm:
+    the candidate contexts of length k are found from the counts of order k-1 and only the
+    (k+1)-grams that start or end with a candidate are counted.
+
+    The result has the same keys as build_transition_matrix. occurrence_mats[0] is the same dense
+    vector, higher orders are SparseOccurrenceMat instances holding the rows (next symbol counts)
+    and columns (previous symbol counts) of the candidate contexts only. N and p_starting_symbol
+    are exact.
+    """
+    alphabet_length = len(alphabet)
+    alphabet_index = {item: idx for idx, item in enumerate(alphabet)}
+    eps = np.finfo(float).eps
+
+    songs = [
+        np.array([alphabet_index[item] for item in cur_sequence], dtype=np.intp)
+        for cur_sequence in dataset
+        if len(cur_sequence) > 0
+    ]
+    song_lengths = np.array([len(song) for song in songs], dtype=np.intp)
+
+    if songs:
+        seq = np.concatenate(songs)
+    else:
+        seq = np.zeros(0, dtype=np.intp)
+
+    # index one past the last item of the song each position belongs to
+    song_end = np.repeat(np.cumsum(song_lengths), song_lengths)
+    positions = np.arange(len(seq))
+
+    p_starting_symbol = np.bincount(
+        [song[0] for song in songs], minlength=alphabet_length).astype(np.uint16)
+
+    n = np.array([
+        np.sum(np.maximum(song_lengths - cur_order, 0))
+        for cur_order in range(order + 1)
+    ], dtype=np.uint32)
+
+    occurrence_mats = [np.bincount(seq, minlength=alphabet_length).astype(np.uint16)]
+
+    # candidate contexts of length 1, with the same test pst_learn applies
+    contexts = np.array([
+        [alphabet_index] for alphabet_index in range(alphabet_length)
+        if np.single(occurrence_mats[0][alphabet_index] / n[0]) >= p_min
+    ], dtype=np.intp).reshape(-1, 1)
+
+    # context_ids[t] is the candidate id of the context starting at position t, or -1
+    context_table = np.full(alphabet_length, -1, dtype=np.intp)
+    context_table[contexts[:, 0]] = np.arange(len(contexts))
+    context_ids = context_table[seq]
+
+    for cur_order in range(1, order + 1):
+        num_contexts = len(contexts)
+
+        has_next = positions + cur_order < song_end
+        next_context_ids = np.append(context_ids[1:], -1)
+
+        # next symbol counts of each candidate context
+        t = np.nonzero(has_next & (context_ids >= 0))[0]
+        rows = np.bincount(
+            context_ids[t] * alphabet_length + seq[t + cur_order],
+            minlength=num_contexts * alphabet_length
+        ).reshape(num_contexts, alphabet_length).astype(np.uint16)
+
+        # previous symbol counts of each candidate context
+        t = np.nonzero(has_next & (next_context_ids >= 0))[0]
+        cols = np.bincount(
+            next_context_ids[t] * alphabet_length + seq[t],
+            minlength=num_contexts * alphabet_length
+        ).reshape(num_contexts, alphabet_length).astype(np.uint16)
+
+        occurrence_mats.append(SparseOccurrenceMat(alphabet_length, contexts, rows, cols))
+
+        if cur_order == order:
+            break
+
+        # extend the candidates whose one symbol extension passes p_min
+        parent_ids, symbols = np.nonzero(cols / (n[cur_order] + eps) >= p_min)
+        contexts = np.concatenate([symbols[:, np.newaxis], contexts[parent_ids]], axis=1)
+
+        context_table = np.full((num_contexts, alphabet_length), -1, dtype=np.intp)
+        context_table[parent_ids, symbols] = np.arange(len(contexts))
+
+        extended = t[next_context_ids[t] >= 0]
+        context_ids = np.full(len(seq), -1, dtype=np.intp)
+        context_ids[extended] = context_table[next_context_ids[extended], seq[extended]]
+
+    return {
+        "occurrence_mats": occurrence_mats,
+        "p_starting_symbol": p_starting_symbol,
+        "alphabet": alphabet,
+        "N": n
+    }
+
+
+class SparseOccurrenceMat:
+    """Co-occurrence counts of a single order, kept only for a set of contexts.
+
+    Stands in for the dense matrix of shape (alphabet size,) * (k + 1) built by
+    build_transition_matrix, for the indexing pst_learn does on it:
+        mat[s]          next symbol counts of the context s, a tuple of k indexes
+        mat[:, s]       counts of each symbol preceding the context s
+        mat[s + (x,)]   count of a single (k+1)-gram
+    Each index of s may also be an array to gather several contexts at once, as numpy does.
+    Contexts that are not kept read as zero counts.
+
+    Inputs:
+        alphabet_size (int) - number of symbols
+        contexts [num contexts, k] - alphabet indexes of the kept contexts
+        rows [num contexts, alphabet size] - next symbol counts of each context
+        cols [num contexts, alphabet size] - previous symbol counts of each context
+    """
+
+    def __init__(self, alphabet_size, contexts, rows, cols):
+        contexts = np.asarray(contexts, dtype=np.int64)
+        context_length = contexts.shape[1]
+
+        if alphabet_size ** context_length > np.iinfo(np.int64).max:
+            raise ValueError(
+                f"Contexts of length {context_length} over {alphabet_size} symbols can not be indexed.")
+
+        self.shape = (alphabet_size,) * (context_length + 1)
+        self.ndim = context_length + 1
+        self.dtype = np.asarray(rows).dtype
+        self._weights = alphabet_size ** np.arange(context_length - 1, -1, -1, dtype=np.int64)
+
+        codes = contexts @ self._weights
+        sort_order = np.argsort(codes, kind='stable')
+        self._codes = codes[sort_order]
+        self.contexts = contexts[sort_order]
+        self.rows = np.asarray(rows)[sort_order]
+        self.cols = np.asarray(cols)[sort_order]
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+
+        context_length = self.ndim - 1
+
+        if key and isinstance(key[0], slice):
+            if key[0] != slice(None) or len(key) != self.ndim:
+                raise IndexError("Only mat[:, s] is supported for previous symbol counts.")
+            # numpy puts the full slice axis first when the other indexes are adjacent arrays
+            return np.moveaxis(self._gather(self.cols, key[1:]), -1, 0)
+
+        if len(key) == context_length:
+            return self._gather(self.rows, key)
+
+        if len(key) == self.ndim:
+            counts = self._gather(self.rows, key[:-1])
+            symbols = np.broadcast_to(np.asarray(key[-1]), counts.shape[:-1])
+            return np.take_along_axis(counts, symbols[..., np.newaxis], axis=-1)[..., 0]
+
+        raise IndexError(f"Unsupported index {key} for a matrix of shape {self.shape}.")
+
+    def _gather(self, table, context_key):
+        indexes = np.broadcast_arrays(*[np.asarray(i, dtype=np.int64) for i in context_key])
+        codes = sum(i * w for i, w in zip(indexes, self._weights))
+
+        positions = np.minimum(np.searchsorted(self._codes, codes), max(len(self._codes) - 1, 0))
+        if len(self._codes):
+            found = self._codes[positions] == codes
+        else:
+            found = np.zeros(np.shape(codes), dtype=bool)
+
+        values = np.zeros(np.shape(codes) + (self.shape[0],), dtype=self.dtype)
+        values[found] = table[positions[found]]
+        return values
@@ -1,13 +1,41 @@
 from typing import List
+import numpy as np
 from pypst.transition_mat import (
     build_transition_matrix,
+    build_transition_matrix_from_runs,
     build_alphabet_from_dataset
 )
-from pypst.pst_learn import pst_learn
+from pypst.external_counts import build_transition_matrix_out_of_core
+from pypst.pst_learn import pst_learn, pst_update
 from pypst.pst_to_pfa import pst_convert_to_pfa
+from pypst.streaming import SuffixAutomaton
+from pypst.fit_stats import FitStats, maybe_stage
 
 class PST:
-    """Create a probabilistic suffix tree (PST) from a dataset."""
+    """Create a probabilistic suffix tree (PST) from a dataset.
+
+    Set `track_stats=True` (or pass a `stats_callback`) to record wall time, memory and
+    counters for each fitting stage. They are available afterwards as `fit_stats_`.
+    The callback is called as stats_callback(stage_name, record) when a stage finishes.
+
+    `learn_mode` selects how pst_learn evaluates candidate contexts and `n_jobs` how many
+    processes share the work. With learn_mode='best_first', `max_nodes` bounds the size of
+    the fitted tree. See pst_learn.
+
+    With `prune_counts=True` only the contexts pst_learn can visit for p_min are counted,
+    see build_pruned_transition_matrix. The fitted tree is the same.
+
+    With `max_memory` set (in bytes), the dataset may be any iterable of songs and is counted
+    out of core, see build_transition_matrix_out_of_core. An alphabet is then required.
+
+    With `incremental=True` the counts and the decision taken for every candidate context are
+    kept after fitting, so that `update` can add songs without learning the tree from scratch.
+    The alphabet is fixed when fitting: songs passed to `update` may only hold its symbols. Pass
+    an explicit `alphabet` to cover syllables that only appear in later songs.
+
+    `predictor()` returns a StreamingPredictor that is fed one symbol at a time, for example to
+    follow the output of a syllable decoder live. See SuffixAutomaton.
+    """
 
     def __init__(
         self,
@@ -16,7 +44,15 @@ class PST:
         g_min = .01,
         r = 1.6,
         alpha = 17.5,
-        alphabet = None
+        alphabet = None,
+        learn_mode = 'sequential',
+        n_jobs = 1,
+        max_nodes = None,
+        prune_counts = False,
+        max_memory = None,
+        incremental = False,
+        track_stats = False,
+        stats_callback = None
     ):
         self._L = L
         self._p_min = p_min
@@ -24,6 +60,18 @@ class PST:
         self._r = r
         self._alpha = alpha
         self._alphabet = alphabet
+        self._learn_mode = learn_mode
+        self._n_jobs = n_jobs
+        self._max_nodes = max_nodes
+        self._prune_counts = prune_counts
+        self._max_memory = max_memory
+        self._incremental = incremental
+        self._counts = None
+        self._decisions = None
+        self._automaton = None
+        self._track_stats = track_stats or stats_callback is not None
+        self._stats_callback = stats_callback
+        self.fit_stats_ = None
 
     @property
     def alphabet(self):
@@ -39,21 +87,33 @@ class PST:
             'alpha': self._alpha
         }
 
-    def fit(self, dataset : List[List[str]]):
-        """Fit the PST model to the dataset."""
+    def fit(self, dataset : List[List[str]], run_length_encoded : bool = False):
+        """Fit the PST model to the dataset.
+
+        With run_length_encoded=True each sequence is a list of (item, run length) tuples,
+        see transition_mat.encode_runs.
+        """
 
         if hasattr(self, '_pst'):  # If already fitted, raise a warning or error
             raise ValueError("The model has already been fitted. Please create a new instance to fit again.")
 
 
-        if self._alphabet is None:
-            self._alphabet = build_alphabet_from_dataset(dataset)
+        stats = None
+        if self._track_stats:
+            stats = FitStats(callback=self._stats_callback)
 
-        results = build_transition_matrix(
-            dataset,
-            self._L,
-            alphabet=self._alphabet
-        )
+        with maybe_stage(stats, 'count'):
+            results = self._count_transitions(dataset, run_length_encoded)
+
+        decisions = None
+        if self._incremental:
+            if self._learn_mode == 'best_first':
+                raise ValueError("incremental=True can not be combined with learn_mode='best_first'.")
+
+            if not all(isinstance(mat, np.ndarray) for mat in results['occurrence_mats']):
+                raise ValueError("incremental=True requires the default dense counts.")
+
+            decisions = {}
 
         self._pst = pst_learn(
             results['occurrence_mats'],
@@ -63,7 +123,124 @@ class PST:
             p_min=self._p_min,
             g_min=self._g_min,
             r=self._r,
-            alpha=self._alpha)
+            alpha=self._alpha,
+            mode=self._learn_mode,
+            n_jobs=self._n_jobs,
+            max_nodes=self._max_nodes,
+            decisions=decisions,
+            stats=stats)
+
+        self._automaton = None
+        if self._incremental:
+            # the counts are added to after every update, uint16 would wrap around
+            self._counts = dict(
+                results,
+                occurrence_mats=[mat.astype(np.int64) for mat in results['occurrence_mats']],
+                N=results['N'].astype(np.int64),
+                p_starting_symbol=results['p_starting_symbol'].astype(np.int64))
+            self._decisions = decisions
+
+        if stats is not None:
+            self.fit_stats_ = stats.as_dict()
+
+    def update(self, new_songs : List[List[str]], run_length_encoded : bool = False):
+        """Add songs to the fitted PST.
+
+        Only the candidate contexts whose counts changed are tested again and the tree is patched
+        in place when its nodes stay the same. The tree, and the PFA built from it, are the same as
+        fitting a new PST on all the songs. Requires a PST created with incremental=True.
+        """
+
+        if not hasattr(self, '_pst'):
+            raise ValueError("The model has not been fitted yet. Please call the 'fit' method first.")
+
+        if self._counts is None:
+            raise ValueError("Updating requires a PST created with incremental=True.")
+
+        known_symbols = set(self._alphabet)
+        unknown_symbols = {
+            item[0] if run_length_encoded else item
+            for song in new_songs for item in song
+        } - known_symbols
+        if unknown_symbols:
+            raise ValueError(
+                f"Symbols {sorted(map(str, unknown_symbols))} are not in the alphabet fixed when fitting. "
+                "Create the PST with an explicit alphabet covering them.")
+
+        stats = None
+        if self._track_stats:
+            stats = FitStats(callback=self._stats_callback)
+
+        with maybe_stage(stats, 'count'):
+            if run_length_encoded:
+                new_counts = build_transition_matrix_from_runs(new_songs, self._L, alphabet=self._alphabet)
+            else:
+                new_counts = build_transition_matrix(new_songs, self._L, alphabet=self._alphabet)
+
+            # contexts whose row of next symbol counts changed, per depth
+            changed = []
+            for cur_order, new_mat in enumerate(new_counts['occurrence_mats']):
+                self._counts['occurrence_mats'][cur_order] += new_mat
+                if cur_order == 0:
+                    changed.append({()} if new_mat.any() else set())
+                else:
+                    changed.append(set(map(tuple, np.argwhere(new_mat.any(axis=-1)).tolist())))
+
+            self._counts['N'] += new_counts['N']
+            self._counts['p_starting_symbol'] += new_counts['p_starting_symbol']
+
+        self._pst = pst_update(
+            self._pst,
+            self._counts['occurrence_mats'],
+            alphabet=self._alphabet,
+            N=self._counts['N'],
+            changed=changed,
+            decisions=self._decisions,
+            L=self._L,
+            p_min=self._p_min,
+            g_min=self._g_min,
+            r=self._r,
+            alpha=self._alpha,
+            stats=stats)
+        self._automaton = None
+
+        if stats is not None:
+            self.fit_stats_ = stats.as_dict()
+
+    def _count_transitions(self, dataset, run_length_encoded=False):
+        """Count the n-grams of the dataset with the counting method selected for this PST."""
+
+        if run_length_encoded:
+            if self._prune_counts or self._max_memory is not None:
+                raise ValueError("Run length encoded datasets are only supported with the default counting.")
+
+            results = build_transition_matrix_from_runs(dataset, self._L, alphabet=self._alphabet)
+            self._alphabet = results['alphabet']
+            return results
+
+        if self._max_memory is not None:
+            if self._prune_counts:
+                raise ValueError("prune_counts can not be combined with out of core counting.")
+
+            if self._alphabet is None:
+                raise ValueError("An alphabet is required to count songs out of core.")
+
+            return build_transition_matrix_out_of_core(
+                dataset,
+                self._L,
+                self._alphabet,
+                max_memory=self._max_memory
+            )
+
+        if self._alphabet is None:
+            self._alphabet = build_alphabet_from_dataset(dataset)
+
+        return build_transition_matrix(
+            dataset,
+            self._L,
+            alphabet=self._alphabet,
+            p_min=self._p_min if self._prune_counts else None
+        )
 
     @property
     def tree(self):
@@ -80,4 +257,19 @@ class PST:
         if not hasattr(self, '_pst'):
             raise ValueError("The model has not been fitted yet. Please call the 'fit' method first.")
 
-        return pst_convert_to_pfa(self._pst)
+        return pst_convert_to_pfa(self._pst, self._alphabet)
+
+    @property
+    def automaton(self):
+        """Return the SuffixAutomaton of the fit PST, built on first use."""
+        if not hasattr(self, '_pst'):
+            raise ValueError("The model has not been fitted yet. Please call the 'fit' method first.")
+
+        if self._automaton is None:
+            self._automaton = SuffixAutomaton(self._pst, self._alphabet)
+
+        return self._automaton
+
+    def predictor(self):
+        """Return a StreamingPredictor of the next symbol, starting from an empty history."""
+        return self.automaton.stream()
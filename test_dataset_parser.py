@@ -0,0 +1,134 @@
+import random
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from dataset_parser import SongArchive, split_dataset_by_surgery_date
+
+
+def synthetic_results(num_songs=2000, seed=0):
+    """Records shaped like the output of load_single_bird_syllable_csv."""
+    rng = random.Random(seed)
+    results = []
+    for idx in range(num_songs):
+        animal_id = rng.choice(['USA5288', 'USA5337', None])
+        if animal_id is None or rng.random() < 0.05:
+            recording_time = None
+        else:
+            recording_time = datetime(2024, 5, 1) + timedelta(seconds=rng.randrange(60 * 86400))
+
+        results.append({
+            'file_name': f'song_{idx}.wav',
+            'song_present': rng.choice(['True', 'False']),
+            'animal_id': animal_id,
+            'recording_time': recording_time,
+            'ordered_and_timed_syllables': [
+                (rng.choice('abcdef'), onset * 100.0, onset * 100.0 + 50.0)
+                for onset in range(rng.randrange(12))
+            ]
+        })
+    return results
+
+
+def brute_force(results, bird=None, start=None, end=None, song_present=None, hours=None):
+    """The file names of the matching records, filtering the list one record at a time."""
+    file_names = []
+    for result in results:
+        recording_time = result['recording_time']
+        if bird is not None and result['animal_id'] != bird:
+            continue
+        if (start is not None or end is not None or hours is not None) and recording_time is None:
+            continue
+        if start is not None and recording_time < start:
+            continue
+        if end is not None and recording_time >= end:
+            continue
+        if song_present is not None and (result['song_present'] == 'True') != song_present:
+            continue
+        if hours is not None:
+            first_hour, last_hour = hours
+            hour = recording_time.hour
+            if first_hour <= last_hour and not first_hour <= hour < last_hour:
+                continue
+            if first_hour > last_hour and not (hour >= first_hour or hour < last_hour):
+                continue
+        file_names.append(result['file_name'])
+    return sorted(file_names)
+
+
+QUERIES = [
+    {},
+    {'bird': 'USA5288'},
+    {'bird': 'unknown'},
+    {'start': datetime(2024, 6, 1)},
+    {'end': datetime(2024, 5, 20)},
+    {'bird': 'USA5337', 'start': datetime(2024, 5, 10), 'end': datetime(2024, 6, 3), 'song_present': True},
+    {'song_present': False},
+    {'hours': (6, 12), 'bird': 'USA5288'},
+    {'hours': (22, 4)},
+]
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_select_matches_brute_force(query):
+    results = synthetic_results()
+    archive = SongArchive(results)
+
+    indexes = archive.select(**query)
+    assert sorted(archive.file_names[idx] for idx in indexes) == brute_force(results, **query)
+
+    syllables = {result['file_name']: [s for s, _, _ in result['ordered_and_timed_syllables']] for result in results}
+    songs = archive.songs(**query)
+    assert len(songs) == len(indexes)
+    for idx, song in zip(indexes, songs):
+        assert np.shares_memory(song, archive.syllables) or len(song) == 0
+        assert archive.decode(song) == syllables[archive.file_names[idx]]
+
+
+def test_songs_are_sorted_with_missing_times_last():
+    archive = SongArchive(synthetic_results())
+
+    assert np.all(np.diff(archive.animals) >= 0)
+    for animal in range(len(archive.animal_ids)):
+        times = archive.recording_times[archive.animals == animal]
+        missing = np.isnat(times)
+        num_timed = np.count_nonzero(~missing)
+
+        assert not np.any(missing[:num_timed])
+        assert np.all(times[:num_timed][:-1] <= times[:num_timed][1:])
+
+
+def test_empty_archive():
+    archive = SongArchive([])
+
+    assert len(archive) == 0
+    assert len(archive.select()) == 0
+    assert archive.songs(bird='USA5288', start=datetime(2024, 5, 1), hours=(6, 12)) == []
+
+    pre, post = archive.split_by_surgery_date(datetime(2024, 6, 1))
+    assert len(pre) == 0 and len(post) == 0
+
+
+def test_split_by_surgery_date_matches_scan():
+    results = synthetic_results()
+    timed_results = [result for result in results if result['recording_time'] is not None]
+    archive = SongArchive(results)
+    surgery_date = datetime(2024, 6, 1, 0, 0, 1)
+
+    expected_pre, expected_post = split_dataset_by_surgery_date(timed_results, surgery_date)
+    pre, post = archive.split_by_surgery_date(surgery_date)
+
+    assert sorted(archive.file_names[idx] for idx in pre) == sorted(result['file_name'] for result in expected_pre)
+    assert sorted(archive.file_names[idx] for idx in post) == sorted(result['file_name'] for result in expected_post)
+
+    pre, post = archive.split_by_surgery_date(surgery_date, bird='USA5337')
+    assert all(archive.animal_ids[archive.animals[idx]] == 'USA5337' for idx in np.concatenate([pre, post]))
+
+
+def test_split_by_surgery_date_rejects_exact_match():
+    results = synthetic_results()
+    surgery_date = next(result['recording_time'] for result in results if result['recording_time'] is not None)
+
+    with pytest.raises(ValueError):
+        split_dataset_by_surgery_date([r for r in results if r['recording_time'] is not None], surgery_date)
+    with pytest.raises(ValueError):
+        SongArchive(results).split_by_surgery_date(surgery_date)
@@ -1,14 +1,18 @@
 from pypst import PST
 from typing import Dict
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.stats import entropy
 import math
-import pandas as pd
 
+# matplotlib, scipy and pandas are imported by the functions that use them, so that
+# fitting trees does not pay for importing them
 
-def train_pst(sequence_dataset, L, alphabet=None):
-    """Train a PST of order L on a dataset of sequences."""
+
+def train_pst(sequence_dataset, L, alphabet=None, run_length_encoded=False):
+    """Train a PST of order L on a dataset of sequences.
+
+    Set run_length_encoded=True when the sequences are lists of (syllable, run length)
+    tuples, as returned by build_song_sequences_with_timing(..., run_length_encoded=True).
+    """
     pst = PST(
         L = L,
         p_min = .00073, #0.0073,
@@ -17,12 +21,14 @@ def train_pst(sequence_dataset, L, alphabet=None):
         alpha = 17.5,
         alphabet = alphabet
     )
-    pst.fit(sequence_dataset)
+    pst.fit(sequence_dataset, run_length_encoded=run_length_encoded)
 
     return pst
 
 
 def calculate_metrics(order, syllable_idx, pre_dist, post_dist):
+    from scipy.stats import entropy
+
     # Calculate KL Divergence
     kld = entropy(pre_dist, post_dist)
 
@@ -45,6 +51,8 @@ def calculate_metrics(order, syllable_idx, pre_dist, post_dist):
     }
 
 def plot_before_and_after_distribution(syllables, pre_dist, post_dist):
+    import matplotlib.pyplot as plt
+
     fig, axes = plt.subplots(1, 2, figsize=(12, 5), sharey=True)
     axes[0].stem(syllables, pre_dist, basefmt=" ")
     axes[0].set_title("Pre Lesion Distribution")
@@ -76,13 +84,18 @@ def build_song_sequences_simple(dataset):
 
 
 
-def build_song_sequences_with_timing(dataset):
+def build_song_sequences_with_timing(dataset, run_length_encoded=False):
     """Builds song sequences from a dataset of syllables.
 
     This function considers the timing of syllables in a song. It works
     by calculating the average length of each syllable and then using that
     to determine the number of times a syllable should be repeated in a song.
+
+    With run_length_encoded=True each song is returned as a list of (syllable, repeats)
+    tuples instead, consecutive repeats of the same syllable merged into one run.
     """
+    import pandas as pd
+
     syllables_with_len = []
     for result in dataset:
         for song_syllable in result['ordered_and_timed_syllables']:
@@ -113,7 +126,12 @@ def build_song_sequences_with_timing(dataset):
 
             num_syllables = math.ceil(l / syllable_mean)
 
-            song.extend([s] * num_syllables)
+            if not run_length_encoded:
+                song.extend([s] * num_syllables)
+            elif song and song[-1][0] == s:
+                song[-1] = (s, song[-1][1] + num_syllables)
+            else:
+                song.append((s, num_syllables))
 
         songs.append(song)
     return songs